@@ -6,8 +6,26 @@ Async Manager
 
 主要功能：
 - `to_async`: 將同步函式轉換為 Awaitable。
+- `to_async_batch`: 將同時到達的多個呼叫合併為單一批次執行。
+- `to_async_iter`: 將同步 generator 轉換為非同步迭代器，在 worker thread 中分批預取。
+- `map`: 以有界的並發數對大量輸入執行同步函式，並串流回傳結果。
+- `warm_up` / `lifespan`: 啟動時預先建立執行緒。
 - `CapacityLimiter`: 支援精細的並發控制。
 - `AsyncManager`: 管理多個 Limiter。
+- `AdaptiveLimiter`: 依觀測延遲自動調整容量的 limiter。
+- `PriorityLimiter` / `priority`: 依呼叫優先權分配 token 的 limiter。
+- `WeightedLimiter`: 每個呼叫依權重占用不同數量 token 的 limiter。
+- `HierarchicalLimiter`: 同時受自身與上層 limiter 限制的子 limiter。
+- `KeyedLimiter`: 依 key (例如租戶) 動態建立、閒置後自動移除的 limiter 集合。
+- `RateLimiter`: 限制每秒呼叫次數的 token bucket，可與容量 limiter 併用。
+- `deadline` / `QueueTimeout` / `ExecutionTimeout`: 呼叫期限與逾時例外。
+- `checkpoint` / `current_cancel_token`: worker thread 中的協作式取消。
+- `LimiterOverloaded`: 具名 limiter 的等待佇列 (`max_waiting`) 已滿時拋出的例外。
+- `CircuitBreaker` / `CircuitOpen`: 綁定到具名 limiter 的斷路器，後端持續失敗或變慢時快速拒絕呼叫。
+- `WorkerPool`: 可綁定到具名 limiter 的專屬執行緒池 (bulkhead)，支援執行緒啟動 / 結束 hook。
+- `current_event_loop_token`: `WorkerPool` 的工作中回到 Event Loop 時使用的 token。
+- `ThreadLocal`: 每個執行緒建立一次、執行緒結束時關閉的資源。
+- `TTLCache`: 搭配 `to_async(cache=...)` 使用的 TTL + LRU 結果快取。
 
 使用範例:
     >>> from async_manager import to_async
@@ -16,12 +34,76 @@ Async Manager
     >>>     pass
 """
 from .manager import AsyncManager
-from ._facilitation import to_async, regist_limiter, unregist_limiter, create_limiter
+from .breaker import CircuitBreaker
+from .cache import TTLCache
+from .pool import WorkerPool, current_event_loop_token
+from .threadlocal import ThreadLocal
+from .cancellation import CancelToken, checkpoint, current_cancel_token
+from .deadlines import deadline
+from .exceptions import CircuitOpen, ExecutionTimeout, LimiterOverloaded, OperationCancelled, QueueTimeout
+from .limiters import (
+    AdaptiveLimiter,
+    HierarchicalLimiter,
+    KeyedLimiter,
+    PriorityLimiter,
+    RateLimiter,
+    WeightedLimiter,
+    priority,
+)
+from ._facilitation import (
+    to_async,
+    to_async_batch,
+    to_async_iter,
+    map,
+    regist_limiter,
+    unregist_limiter,
+    create_limiter,
+    regist_rate_limiter,
+    unregist_rate_limiter,
+    create_rate_limiter,
+    regist_keyed_limiter,
+    unregist_keyed_limiter,
+    create_keyed_limiter,
+    warm_up,
+    lifespan,
+)
 
 __all__ = [
     AsyncManager,
+    TTLCache,
+    WorkerPool,
+    current_event_loop_token,
+    ThreadLocal,
+    deadline,
+    QueueTimeout,
+    ExecutionTimeout,
+    CancelToken,
+    checkpoint,
+    current_cancel_token,
+    OperationCancelled,
+    LimiterOverloaded,
+    CircuitBreaker,
+    CircuitOpen,
+    AdaptiveLimiter,
+    PriorityLimiter,
+    WeightedLimiter,
+    HierarchicalLimiter,
+    KeyedLimiter,
+    RateLimiter,
+    priority,
     to_async,
+    to_async_batch,
+    to_async_iter,
+    map,
     regist_limiter,
     unregist_limiter,
     create_limiter,
+    regist_rate_limiter,
+    unregist_rate_limiter,
+    create_rate_limiter,
+    regist_keyed_limiter,
+    unregist_keyed_limiter,
+    create_keyed_limiter,
+    warm_up,
+    lifespan,
 ]
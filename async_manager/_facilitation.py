@@ -7,6 +7,17 @@ from .manager import AsyncManager
 
 module_manager = AsyncManager()
 to_async = module_manager.to_async
+to_async_batch = module_manager.to_async_batch
+to_async_iter = module_manager.to_async_iter
+map = module_manager.map
 regist_limiter = module_manager.regist_limiter
 unregist_limiter = module_manager.unregist_limiter
-create_limiter = module_manager.create_limiter
\ No newline at end of file
+create_limiter = module_manager.create_limiter
+regist_rate_limiter = module_manager.regist_rate_limiter
+unregist_rate_limiter = module_manager.unregist_rate_limiter
+create_rate_limiter = module_manager.create_rate_limiter
+regist_keyed_limiter = module_manager.regist_keyed_limiter
+unregist_keyed_limiter = module_manager.unregist_keyed_limiter
+create_keyed_limiter = module_manager.create_keyed_limiter
+warm_up = module_manager.warm_up
+lifespan = module_manager.lifespan
\ No newline at end of file
@@ -0,0 +1,48 @@
+"""
+此模組負責偵測目前 Python 執行環境的特性，例如是否為 free-threaded (no-GIL) 建置。
+"""
+import os
+import sys
+import sysconfig
+from dataclasses import dataclass
+from typing import Literal
+
+type ThreadingMode = Literal["free-threaded", "gil"]
+
+
+@dataclass(frozen=True, slots=True)
+class RuntimeInfo:
+    """
+    AsyncManager 啟動時偵測並採用的執行模式。
+
+    Attributes:
+        threading_mode: "free-threaded" 表示執行緒可真正平行運行；"gil" 表示受 GIL 限制。
+        default_thread_capacity: 預設執行緒池的並發上限；None 表示沿用 anyio 的預設值。
+    """
+    threading_mode: ThreadingMode
+    default_thread_capacity: int | None
+
+
+def is_free_threaded() -> bool:
+    """
+    判斷目前是否運行在 GIL 已停用的 free-threaded CPython (例如 3.13t)。
+
+    free-threaded 建置仍可能在執行期重新啟用 GIL (例如設定 `PYTHON_GIL=1`，
+    或載入了不支援 free-threading 的擴充模組)，因此需同時檢查建置設定與執行期狀態。
+
+    Returns:
+        bool: GIL 實際停用時回傳 True。
+    """
+    if not sysconfig.get_config_var("Py_GIL_DISABLED"):
+        return False
+    return not sys._is_gil_enabled()
+
+
+def available_cores() -> int:
+    """
+    取得目前行程可使用的 CPU 核心數 (會考慮 CPU affinity)。
+
+    Returns:
+        int: 可用核心數，至少為 1。
+    """
+    return os.process_cpu_count() or 1
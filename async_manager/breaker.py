@@ -0,0 +1,179 @@
+"""
+此模組提供可綁定到具名 limiter 的斷路器 (circuit breaker)。
+
+後端 (例如資料庫) 持續失敗或變慢時，繼續送出呼叫只會讓執行緒與 limiter 名額
+卡在注定失敗的工作上。斷路器依最近呼叫的失敗率與慢呼叫比例切換狀態：
+
+- "closed": 正常放行，記錄每個呼叫的結果。
+- "open": 直接在 Event Loop 上拒絕呼叫 (拋出 `CircuitOpen`)，不占用執行緒與 limiter。
+- "half_open": 開啟 `open_duration` 秒後，放行少量試探呼叫，依結果決定關閉或再次開啟。
+"""
+import time
+from collections import deque
+from typing import Literal
+
+type BreakerState = Literal["closed", "open", "half_open"]
+
+
+class CircuitBreaker:
+    """
+    以最近 `window` 個呼叫的結果計算失敗率與慢呼叫比例的斷路器。
+
+    所有方法都必須在 Event Loop 上呼叫；綁定到具名 limiter 後由 AsyncManager
+    自動呼叫 `allow()` / `record()`，一般不需要直接使用。
+
+    Example:
+        >>> breaker = CircuitBreaker(failure_rate=0.5, slow_call_duration=2.0, open_duration=30)
+        >>> with manager.create_limiter("db", 16, breaker=breaker):
+        >>>     await query("SELECT 1")
+    """
+    def __init__(
+        self,
+        *,
+        failure_rate: float = 0.5,
+        slow_call_rate: float = 1.0,
+        slow_call_duration: float | None = None,
+        window: int = 100,
+        min_calls: int = 10,
+        open_duration: float = 30.0,
+        half_open_calls: int = 5,
+        failure_exceptions: tuple[type[BaseException], ...] = (Exception,),
+    ):
+        """
+        Args:
+            failure_rate: 失敗比例達到此值 (0 ~ 1) 時開啟斷路器。
+            slow_call_rate: 慢呼叫比例達到此值 (0 ~ 1) 時開啟斷路器。
+            slow_call_duration: 執行時間 (不含等待 limiter) 達到此秒數的呼叫視為慢呼叫；
+                    None 表示不判斷慢呼叫。
+            window: 計算比例時使用的最近呼叫數。
+            min_calls: 視窗內至少累積多少個呼叫才開始判斷，避免少量樣本誤判。
+            open_duration: 開啟後經過多少秒進入 half-open。
+            half_open_calls: half-open 時放行的試探呼叫數，全部完成後依同樣的門檻
+                    決定關閉或再次開啟。
+            failure_exceptions: 視為失敗的例外型別，預設為所有 Exception
+                    (包含 `ExecutionTimeout`)。其他例外 (例如取消) 不計入。
+
+        Raises:
+            ValueError: 比例不在 0 ~ 1 之間，或數量參數小於 1。
+        """
+        if not 0 < failure_rate <= 1 or not 0 < slow_call_rate <= 1:
+            raise ValueError("failure_rate 與 slow_call_rate 必須介於 0 (不含) 與 1 之間")
+        if window < 1 or min_calls < 1 or half_open_calls < 1:
+            raise ValueError("window、min_calls 與 half_open_calls 必須大於等於 1")
+        self.failure_rate = failure_rate
+        self.slow_call_rate = slow_call_rate
+        self.slow_call_duration = slow_call_duration
+        self.window = window
+        self.min_calls = min_calls
+        self.open_duration = open_duration
+        self.half_open_calls = half_open_calls
+        self.failure_exceptions = failure_exceptions
+        self._state: BreakerState = "closed"
+        # (失敗, 慢呼叫) 的最近結果
+        self._outcomes: deque[tuple[bool, bool]] = deque()
+        self._failures = 0
+        self._slow = 0
+        self._opened_at = 0.0
+        # half-open 時已放行的試探呼叫數
+        self._trials = 0
+
+    @property
+    def state(self) -> BreakerState:
+        """
+        目前的狀態："closed"、"open" 或 "half_open"。
+        """
+        self._refresh()
+        return self._state
+
+    def allow(self) -> bool:
+        """
+        判斷是否放行一個呼叫。half-open 時每次放行都會占用一個試探名額，
+        放行後沒有執行的呼叫必須呼叫 `forget()` 歸還。
+
+        Returns:
+            bool: True 表示放行；False 表示斷路器開啟 (或試探名額已用完)。
+        """
+        self._refresh()
+        if self._state == "closed":
+            return True
+        if self._state == "half_open" and self._trials < self.half_open_calls:
+            self._trials += 1
+            return True
+        return False
+
+    def forget(self) -> None:
+        """
+        放行的呼叫沒有執行 (例如等待 limiter 時逾時或被取消)，不計入結果。
+        """
+        if self._state == "half_open" and self._trials > 0:
+            self._trials -= 1
+
+    def record(self, duration: float, error: BaseException | None = None) -> None:
+        """
+        記錄一個已執行呼叫的結果，並依門檻切換狀態。
+
+        Args:
+            duration: 執行時間 (秒)。
+            error: 呼叫拋出的例外；None 表示成功。不屬於 failure_exceptions 的例外不計入。
+        """
+        if error is not None and not isinstance(error, self.failure_exceptions):
+            self.forget()
+            return
+        if self._state == "open":
+            # 開啟前就已送出的呼叫，結果不影響狀態
+            return
+
+        failed = error is not None
+        slow = self.slow_call_duration is not None and duration >= self.slow_call_duration
+        self._outcomes.append((failed, slow))
+        self._failures += failed
+        self._slow += slow
+
+        if self._state == "half_open":
+            if len(self._outcomes) >= self.half_open_calls:
+                if self._tripped():
+                    self._open()
+                else:
+                    self._reset("closed")
+            return
+
+        if len(self._outcomes) > self.window:
+            old_failed, old_slow = self._outcomes.popleft()
+            self._failures -= old_failed
+            self._slow -= old_slow
+        if len(self._outcomes) >= self.min_calls and self._tripped():
+            self._open()
+
+    def reset(self) -> None:
+        """
+        清除記錄並回到 "closed"。
+        """
+        self._reset("closed")
+
+    def _tripped(self) -> bool:
+        calls = len(self._outcomes)
+        return (
+            self._failures / calls >= self.failure_rate
+            or self._slow / calls >= self.slow_call_rate
+        )
+
+    def _open(self) -> None:
+        self._reset("open")
+        self._opened_at = time.monotonic()
+
+    def _reset(self, state: BreakerState) -> None:
+        self._state = state
+        self._outcomes.clear()
+        self._failures = 0
+        self._slow = 0
+        self._trials = 0
+
+    def _refresh(self) -> None:
+        if self._state == "open" and time.monotonic() - self._opened_at >= self.open_duration:
+            self._reset("half_open")
+
+    def __repr__(self) -> str:
+        return (
+            f"CircuitBreaker(state={self.state!r}, calls={len(self._outcomes)}, "
+            f"failures={self._failures}, slow={self._slow})"
+        )
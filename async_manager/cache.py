@@ -0,0 +1,107 @@
+"""
+此模組提供 `to_async(cache=...)` 使用的結果快取。
+
+快取只會在 Event Loop 上被存取，因此不需要任何鎖。
+"""
+import time
+from collections import OrderedDict
+from typing import Hashable, NamedTuple
+
+
+class CacheInfo(NamedTuple):
+    """
+    快取統計資訊，欄位與 `functools.lru_cache` 的 `cache_info()` 相同。
+    """
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class TTLCache:
+    """
+    具備 TTL 過期與 LRU 淘汰機制的結果快取。
+
+    每個被裝飾的函式應使用各自的 TTLCache 實例，快取 key 只由呼叫參數組成。
+
+    Example:
+        >>> @manager.to_async(cache=TTLCache(maxsize=1024, ttl=60))
+        >>> def lookup(user_id: int) -> dict:
+        >>>     ...
+    """
+    def __init__(self, maxsize: int, ttl: float | None = None):
+        """
+        Args:
+            maxsize: 最多保留的項目數，超過時淘汰最久未使用的項目。
+            ttl: 每個項目的存活秒數；None 表示不會過期。
+
+        Raises:
+            ValueError: maxsize 小於 1 或 ttl 不是正數。
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize 必須大於等於 1")
+        if ttl is not None and ttl <= 0:
+            raise ValueError("ttl 必須為正數")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Hashable, tuple[float, object]] = OrderedDict()
+
+    def get(self, key: Hashable, default: object = None) -> object:
+        """
+        取得快取值，並更新命中 / 未命中計數。
+
+        Args:
+            key: 快取 key。
+            default: 未命中 (或已過期) 時回傳的值。
+
+        Returns:
+            object: 快取值或 default。
+        """
+        entry = self._data.get(key, None)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at >= time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._data[key]
+        self.misses += 1
+        return default
+
+    def set(self, key: Hashable, value: object) -> None:
+        """
+        寫入快取值；超過 maxsize 時淘汰最久未使用的項目。
+
+        Args:
+            key: 快取 key。
+            value: 要快取的值。
+        """
+        expires_at = (
+            time.monotonic() + self.ttl if self.ttl is not None else float("inf")
+        )
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        """
+        清除所有快取項目與統計數據。
+        """
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def info(self) -> CacheInfo:
+        """
+        取得快取統計資訊。
+
+        Returns:
+            CacheInfo: 命中數、未命中數、容量上限與目前項目數。
+        """
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._data))
+
+    def __len__(self) -> int:
+        return len(self._data)
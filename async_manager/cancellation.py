@@ -0,0 +1,102 @@
+"""
+此模組提供 worker thread 中的協作式取消 (cooperative cancellation)。
+
+以 `to_async(cancellable=True)` 裝飾的同步函式在執行期間可透過
+`current_cancel_token()` 取得本次呼叫的 `CancelToken`，或在迴圈中呼叫
+`checkpoint()`；呼叫端被取消或逾時後，函式即可提早結束，
+立即釋放執行緒與 limiter 的名額。
+"""
+import threading
+from contextvars import ContextVar
+from typing import Callable
+
+from .exceptions import OperationCancelled
+
+
+class CancelToken:
+    """
+    一次呼叫的取消狀態，可在任何執行緒中讀取。
+
+    Example:
+        >>> @to_async(cancellable=True)
+        >>> def poll(url: str):
+        >>>     token = current_cancel_token()
+        >>>     while not token.wait(1.0):
+        >>>         if ready(url):
+        >>>             return fetch(url)
+    """
+    __slots__ = ("_event",)
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        """
+        呼叫端是否已取消或逾時。
+        """
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        """
+        標記為已取消 (由 AsyncManager 呼叫)。
+        """
+        self._event.set()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """
+        等待至多 timeout 秒，期間被取消時立即返回；可用來取代 `time.sleep`。
+
+        Args:
+            timeout: 最多等待的秒數；None 表示一直等到被取消。
+
+        Returns:
+            bool: 是否已被取消。
+        """
+        return self._event.wait(timeout)
+
+    def raise_if_cancelled(self) -> None:
+        """
+        Raises:
+            OperationCancelled: 呼叫端已取消或逾時。
+        """
+        if self._event.is_set():
+            raise OperationCancelled("呼叫端已取消")
+
+
+_cancel_token: ContextVar[CancelToken | None] = ContextVar("async_manager_cancel_token", default=None)
+
+
+def current_cancel_token() -> CancelToken | None:
+    """
+    取得目前呼叫的 CancelToken；不在 `to_async(cancellable=True)` 的函式中時為 None。
+    """
+    return _cancel_token.get()
+
+
+def checkpoint() -> None:
+    """
+    在同步函式中檢查呼叫端是否已取消或逾時；不在 `to_async(cancellable=True)`
+    的函式中時不做任何事。
+
+    Raises:
+        OperationCancelled: 呼叫端已取消或逾時。
+
+    Example:
+        >>> @to_async(cancellable=True)
+        >>> def crunch(rows):
+        >>>     for row in rows:
+        >>>         checkpoint()
+        >>>         process(row)
+    """
+    token = _cancel_token.get()
+    if token is not None:
+        token.raise_if_cancelled()
+
+
+def _call_with_token[T](token: CancelToken, job: Callable[[], T]) -> T:
+    """
+    在 worker thread 中設定本次呼叫的 CancelToken 後執行 job。
+    """
+    _cancel_token.set(token)
+    return job()
@@ -0,0 +1,36 @@
+"""
+此模組提供以 context 設定的呼叫期限 (deadline)。
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import anyio
+
+_deadline: ContextVar[float | None] = ContextVar("async_manager_deadline", default=None)
+
+
+@contextmanager
+def deadline(seconds: float):
+    """
+    限制此 context 內經由 `to_async` 發出的呼叫必須在 seconds 秒內完成。
+
+    期限涵蓋等待 (速率限制與 limiter) 與執行，並與 `to_async(timeout=...)`、
+    `to_async(queue_timeout=...)` 取較早者。巢狀使用時以較早的期限為準。
+    必須在 Event Loop 上使用。
+
+    Args:
+        seconds: 距離期限的秒數。
+
+    Example:
+        >>> with deadline(2.0):
+        >>>     await query("SELECT 1")
+    """
+    value = anyio.current_time() + seconds
+    current = _deadline.get()
+    if current is not None:
+        value = min(value, current)
+    token = _deadline.set(value)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
@@ -0,0 +1,51 @@
+"""
+此模組定義 async_manager 拋出的例外。
+"""
+
+
+class QueueTimeout(TimeoutError):
+    """
+    呼叫在期限內沒有取得 limiter (或通過速率限制)，函式尚未開始執行。
+    """
+
+
+class ExecutionTimeout(TimeoutError):
+    """
+    函式已開始執行，但沒有在期限內完成。
+
+    執行緒後端無法中斷執行中的同步函式，該執行緒會被放棄 (abandoned) 並在背景
+    繼續執行，直到結束前都會占用 limiter 的名額。
+    """
+
+
+class OperationCancelled(Exception):
+    """
+    由 `checkpoint()` 在 worker thread 中拋出，表示呼叫端已取消或逾時，
+    同步函式應盡快結束以釋放執行緒與 limiter 的名額。
+    """
+
+
+class LimiterOverloaded(Exception):
+    """
+    具名 limiter 的等待佇列已滿 (`max_waiting`)，呼叫被拒絕或被較新的呼叫擠出，
+    函式沒有執行。
+
+    Attributes:
+        limiter: limiter 名稱。
+    """
+    def __init__(self, limiter: str):
+        super().__init__(f"Limiter {limiter} 等待中的呼叫過多，已拒絕此呼叫")
+        self.limiter = limiter
+
+
+class CircuitOpen(Exception):
+    """
+    具名 limiter 的斷路器 (`CircuitBreaker`) 已開啟，呼叫在 Event Loop 上直接被拒絕，
+    沒有占用執行緒或 limiter 的名額，函式沒有執行。
+
+    Attributes:
+        limiter: limiter 名稱。
+    """
+    def __init__(self, limiter: str):
+        super().__init__(f"Limiter {limiter} 的斷路器已開啟，已拒絕此呼叫")
+        self.limiter = limiter
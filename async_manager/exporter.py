@@ -0,0 +1,233 @@
+"""
+此模組將 AsyncManager 的統計資料輸出為 OpenMetrics (Prometheus) 文字格式。
+
+提供三種使用方式：
+- `render_openmetrics(manager)`: 直接取得文字內容。
+- `metrics_app(manager)`: 可掛載到既有 ASGI 應用程式 (例如 FastAPI) 的 ASGI app。
+- `start_http_server(manager, port)`: 在背景執行緒啟動獨立的 HTTP 伺服器。
+"""
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import anyio
+import anyio.from_thread
+import anyio.lowlevel
+
+from .manager import AsyncManager
+from .metrics import Histogram
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+_PREFIX = "async_manager"
+
+# bucket 上界對應的 `le` 標籤字串，依 bucket 組合快取以避免每次輸出重新格式化
+_LE_LABELS: dict[tuple[float, ...], tuple[str, ...]] = {}
+
+_CIRCUIT_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+def render_openmetrics(manager: AsyncManager) -> str:
+    """
+    將 AsyncManager 追蹤的所有統計資料輸出為 OpenMetrics 文字格式。
+
+    輸出內容包含具名 limiter 的容量、使用率、執行中 / 等待中 / 已放棄 / 被拒絕的呼叫數、斷路器狀態、
+    等待與執行時間 Histogram，以及各函式的呼叫次數、逾時次數與快取命中數。
+    統計資料只能在 Event Loop 上讀取，因此必須在 Event Loop 上呼叫。
+
+    Args:
+        manager: 要輸出統計資料的 AsyncManager。
+
+    Returns:
+        str: 以 `# EOF` 結尾的 OpenMetrics 文字。
+    """
+    lines: list[str] = []
+    add = lines.append
+    limiters = [(_label("limiter", name), stats) for name, stats in manager.stats().items()]
+    breakers = [(name, _label("limiter", name)) for name in manager.stats() if manager.get_breaker(name)]
+    functions = [(_label("function", name), stats) for name, stats in manager.function_stats().items()]
+
+    add(f"# TYPE {_PREFIX}_limiter_capacity gauge")
+    add(f"# HELP {_PREFIX}_limiter_capacity Total tokens of the limiter.")
+    for label, stats in limiters:
+        add(f"{_PREFIX}_limiter_capacity{{{label}}} {_number(stats.capacity)}")
+
+    add(f"# TYPE {_PREFIX}_limiter_saturation gauge")
+    add(f"# HELP {_PREFIX}_limiter_saturation Borrowed tokens divided by total tokens.")
+    for label, stats in limiters:
+        capacity = stats.capacity
+        saturation = stats.limiter.borrowed_tokens / capacity if capacity else 0.0
+        add(f"{_PREFIX}_limiter_saturation{{{label}}} {_number(saturation)}")
+
+    add(f"# TYPE {_PREFIX}_limiter_in_flight gauge")
+    add(f"# HELP {_PREFIX}_limiter_in_flight Calls holding a token of the limiter.")
+    for label, stats in limiters:
+        add(f"{_PREFIX}_limiter_in_flight{{{label}}} {stats.in_flight}")
+
+    add(f"# TYPE {_PREFIX}_limiter_waiting gauge")
+    add(f"# HELP {_PREFIX}_limiter_waiting Calls waiting to acquire the limiter.")
+    for label, stats in limiters:
+        add(f"{_PREFIX}_limiter_waiting{{{label}}} {stats.waiting}")
+
+    add(f"# TYPE {_PREFIX}_limiter_abandoned gauge")
+    add(f"# HELP {_PREFIX}_limiter_abandoned Abandoned threads still holding a token of the limiter.")
+    for label, stats in limiters:
+        add(f"{_PREFIX}_limiter_abandoned{{{label}}} {stats.abandoned}")
+
+    add(f"# TYPE {_PREFIX}_limiter_shed counter")
+    add(f"# HELP {_PREFIX}_limiter_shed Calls rejected or dropped because the wait queue was full.")
+    for label, stats in limiters:
+        add(f"{_PREFIX}_limiter_shed_total{{{label}}} {stats.shed}")
+
+    add(f"# TYPE {_PREFIX}_limiter_short_circuited counter")
+    add(f"# HELP {_PREFIX}_limiter_short_circuited Calls rejected because the circuit breaker was open.")
+    for label, stats in limiters:
+        add(f"{_PREFIX}_limiter_short_circuited_total{{{label}}} {stats.short_circuited}")
+
+    add(f"# TYPE {_PREFIX}_limiter_circuit_state gauge")
+    add(f"# HELP {_PREFIX}_limiter_circuit_state Circuit breaker state: 0 closed, 1 half-open, 2 open.")
+    for name, label in breakers:
+        # 讀取 `state` 會切換到 half-open，輸出時只讀取目前記錄的狀態
+        add(f"{_PREFIX}_limiter_circuit_state{{{label}}} {_CIRCUIT_STATES[manager.get_breaker(name)._state]}")
+
+    _histogram(add, f"{_PREFIX}_limiter_wait_seconds", "Time spent waiting to acquire the limiter.",
+               [(label, stats.wait_time) for label, stats in limiters])
+    _histogram(add, f"{_PREFIX}_limiter_run_seconds", "Time spent running while holding the limiter.",
+               [(label, stats.run_time) for label, stats in limiters])
+
+    add(f"# TYPE {_PREFIX}_function_calls counter")
+    add(f"# HELP {_PREFIX}_function_calls Calls made to the decorated function.")
+    for label, stats in functions:
+        add(f"{_PREFIX}_function_calls_total{{{label}}} {stats.calls}")
+
+    add(f"# TYPE {_PREFIX}_function_queue_timeouts counter")
+    add(f"# HELP {_PREFIX}_function_queue_timeouts Calls that timed out before starting to run.")
+    for label, stats in functions:
+        add(f"{_PREFIX}_function_queue_timeouts_total{{{label}}} {stats.queue_timeouts}")
+
+    add(f"# TYPE {_PREFIX}_function_timeouts counter")
+    add(f"# HELP {_PREFIX}_function_timeouts Calls that timed out while running.")
+    for label, stats in functions:
+        add(f"{_PREFIX}_function_timeouts_total{{{label}}} {stats.timeouts}")
+
+    add(f"# TYPE {_PREFIX}_function_abandoned gauge")
+    add(f"# HELP {_PREFIX}_function_abandoned Abandoned threads of the function still running.")
+    for label, stats in functions:
+        add(f"{_PREFIX}_function_abandoned{{{label}}} {stats.abandoned}")
+
+    add(f"# TYPE {_PREFIX}_function_cache_hits counter")
+    add(f"# HELP {_PREFIX}_function_cache_hits Result cache hits of the decorated function.")
+    for label, stats in functions:
+        if stats.cache is not None:
+            add(f"{_PREFIX}_function_cache_hits_total{{{label}}} {stats.cache.hits}")
+
+    add(f"# TYPE {_PREFIX}_function_cache_misses counter")
+    add(f"# HELP {_PREFIX}_function_cache_misses Result cache misses of the decorated function.")
+    for label, stats in functions:
+        if stats.cache is not None:
+            add(f"{_PREFIX}_function_cache_misses_total{{{label}}} {stats.cache.misses}")
+
+    add("# EOF\n")
+    return "\n".join(lines)
+
+
+def metrics_app(manager: AsyncManager):
+    """
+    建立輸出 OpenMetrics 文字的 ASGI app。
+
+    Args:
+        manager: 要輸出統計資料的 AsyncManager。
+
+    Returns:
+        ASGI app，可掛載到既有應用程式，例如 `app.mount("/metrics", metrics_app(manager))`。
+    """
+    async def app(scope, receive, send):
+        if scope["type"] != "http":
+            return
+        body = render_openmetrics(manager).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", CONTENT_TYPE.encode()),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    return app
+
+
+def start_http_server(
+    manager: AsyncManager,
+    port: int,
+    addr: str = "127.0.0.1",
+) -> ThreadingHTTPServer:
+    """
+    在背景 daemon 執行緒啟動只輸出 OpenMetrics 文字的 HTTP 伺服器。
+
+    必須在 Event Loop 上呼叫：每個請求都會回到該 Event Loop 產生輸出內容，
+    Event Loop 結束後請求會收到 503。
+
+    Args:
+        manager: 要輸出統計資料的 AsyncManager。
+        port: 監聽的連接埠；傳入 0 時由系統指派。
+        addr: 監聽的位址，預設只接受本機連線。
+
+    Returns:
+        ThreadingHTTPServer: 伺服器實例，可呼叫 `shutdown()` 停止。
+    """
+    token = anyio.lowlevel.current_token()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            try:
+                text = anyio.from_thread.run_sync(render_openmetrics, manager, token = token)
+            except anyio.RunFinishedError:
+                self.send_error(503)
+                return
+            body = text.encode()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((addr, port), Handler)
+    threading.Thread(
+        target=server.serve_forever,
+        name="async-manager-metrics",
+        daemon=True,
+    ).start()
+    return server
+
+
+def _histogram(add, name: str, description: str, series: list[tuple[str, Histogram]]) -> None:
+    add(f"# TYPE {name} histogram")
+    add(f"# HELP {name} {description}")
+    for label, histogram in series:
+        cumulative = 0
+        for le, count in zip(_le_labels(histogram.buckets), histogram.counts):
+            cumulative += count
+            add(f'{name}_bucket{{{label},le="{le}"}} {cumulative}')
+        add(f"{name}_count{{{label}}} {histogram.count}")
+        add(f"{name}_sum{{{label}}} {_number(histogram.sum)}")
+
+
+def _le_labels(buckets: tuple[float, ...]) -> tuple[str, ...]:
+    labels = _LE_LABELS.get(buckets)
+    if labels is None:
+        labels = _LE_LABELS[buckets] = tuple(_number(bound) for bound in buckets)
+    return labels
+
+
+def _label(key: str, value: str) -> str:
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return f'{key}="{escaped}"'
+
+
+def _number(value: float) -> str:
+    return "+Inf" if value == math.inf else repr(value)
@@ -0,0 +1,633 @@
+"""
+此模組提供可註冊到 AsyncManager 的自訂 limiter。
+
+所有 limiter 都與 `anyio.CapacityLimiter` 共用相同的介面
+(`acquire_on_behalf_of` / `release_on_behalf_of` / `total_tokens` / `borrowed_tokens`)，
+因此可以用在任何接受具名 limiter 的地方，例如 `to_async(limiter="db")`。
+`RateLimiter` 則限制每秒的呼叫次數，可與上述 limiter 搭配使用。
+limiter 只能在 Event Loop 上使用，不需要任何鎖。
+"""
+import heapq
+import itertools
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator
+
+import anyio
+import anyio.lowlevel
+
+type AnyLimiter = anyio.CapacityLimiter | BaseLimiter
+"""AsyncManager 可註冊的 limiter 類型。"""
+
+
+_BASELINE_DRIFT = 0.01
+"""AdaptiveLimiter 的 baseline 每秒上漂的比例。"""
+
+
+_priority: ContextVar[int | None] = ContextVar("async_manager_priority", default=None)
+
+
+@contextmanager
+def priority(value: int):
+    """
+    設定此 context 內呼叫的優先權，供 `PriorityLimiter` 使用。
+
+    數值越大越優先；會覆寫 `to_async(priority=...)` 設定的函式預設值。
+
+    Args:
+        value: 優先權。
+
+    Example:
+        >>> with priority(10):
+        >>>     await interactive_query()
+    """
+    token = _priority.set(value)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> int:
+    """
+    取得目前 context 的優先權；未設定時為 0。
+    """
+    value = _priority.get()
+    return 0 if value is None else value
+
+
+class _Waiter:
+    """
+    等待取得 token 的呼叫。
+    """
+    __slots__ = ("borrower", "cost", "event", "granted", "cancelled")
+
+    def __init__(self, borrower: object, cost: int):
+        self.borrower = borrower
+        self.cost = cost
+        self.event = anyio.Event()
+        self.granted = False
+        self.cancelled = False
+
+
+class BaseLimiter:
+    """
+    自訂 limiter 的基底類別。
+
+    等待中的呼叫以 heap 排序 (預設為 FIFO)，新增與取消都是 O(log n)。
+    每個呼叫可以占用不同數量的 token (見 `WeightedLimiter`)。
+    子類別可以覆寫 `_order` 決定等待順序、覆寫 `_on_release` 取得每個呼叫
+    持有 token 的時間，或在執行期間調整 `total_tokens`。
+    """
+    def __init__(self, total_tokens: float):
+        """
+        Args:
+            total_tokens: 可同時借出的 token 數量。
+
+        Raises:
+            ValueError: total_tokens 小於 1。
+        """
+        if total_tokens < 1:
+            raise ValueError("total_tokens 必須大於等於 1")
+        self._total_tokens = total_tokens
+        # borrower -> (取得 token 的時間, 占用的 token 數量)
+        self._borrowers: dict[object, tuple[float, int]] = {}
+        self._used = 0
+        # (排序 key, 序號, waiter)；被取消的 waiter 延遲到抵達 heap 頂端時才移除
+        self._waiters: list[tuple[object, int, _Waiter]] = []
+        self._waiting = 0
+        self._sequence = itertools.count()
+        # 由 KeyedLimiter 建立時指向該集合，讓集合的容量與借出總和不必逐一加總
+        self._keyed: KeyedLimiter | None = None
+
+    @property
+    def total_tokens(self) -> float:
+        """
+        可同時借出的 token 數量；調高時會立即喚醒等待中的呼叫。
+        """
+        return self._total_tokens
+
+    @total_tokens.setter
+    def total_tokens(self, value: float) -> None:
+        if value < 1:
+            raise ValueError("total_tokens 必須大於等於 1")
+        if self._keyed is not None:
+            self._keyed._total_tokens += value - self._total_tokens
+        self._total_tokens = value
+        self._wake()
+
+    @property
+    def borrowed_tokens(self) -> int:
+        """
+        目前已借出的 token 數量 (有權重時為權重總和)。
+        """
+        return self._used
+
+    @property
+    def available_tokens(self) -> float:
+        """
+        目前可借出的 token 數量。
+        """
+        return self._total_tokens - self._used
+
+    @property
+    def waiting(self) -> int:
+        """
+        目前等待中的呼叫數。
+        """
+        return self._waiting
+
+    async def acquire_on_behalf_of(self, borrower: object, cost: int = 1) -> None:
+        """
+        代替 borrower 取得 token，必要時等待。
+
+        Args:
+            borrower: 持有 token 的物件，釋放時需傳入同一個物件。
+            cost: 此呼叫占用的 token 數量。超過 `total_tokens` 的呼叫會在
+                  limiter 完全閒置時取得 token，避免永遠無法執行。
+
+        Raises:
+            ValueError: cost 小於 1。
+            RuntimeError: borrower 已經持有此 limiter 的 token。
+        """
+        if cost < 1:
+            raise ValueError("cost 必須大於等於 1")
+        if borrower in self._borrowers:
+            raise RuntimeError("此 borrower 已持有此 limiter 的 token")
+
+        if not self._waiting and self._fits(cost):
+            self._grant(borrower, cost)
+            await anyio.lowlevel.cancel_shielded_checkpoint()
+            return
+
+        waiter = _Waiter(borrower, cost)
+        heapq.heappush(self._waiters, (self._order(), next(self._sequence), waiter))
+        self._waiting += 1
+        try:
+            await waiter.event.wait()
+        except BaseException:
+            if waiter.granted:
+                self._release(borrower)
+            else:
+                waiter.cancelled = True
+                self._waiting -= 1
+                self._compact()
+                # 被取消的若是 heap 頂端的大型呼叫，後面較小的呼叫可能已經放得下
+                self._wake()
+            raise
+
+    def release_on_behalf_of(self, borrower: object) -> None:
+        """
+        釋放 borrower 持有的 token，並喚醒等待中的呼叫。
+
+        Raises:
+            RuntimeError: borrower 沒有持有此 limiter 的 token。
+        """
+        self._release(borrower)
+
+    async def __aenter__(self) -> None:
+        await self.acquire_on_behalf_of(anyio.get_current_task())
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.release_on_behalf_of(anyio.get_current_task())
+
+    def _release(self, borrower: object) -> None:
+        held = self._borrowers.pop(borrower, None)
+        if held is None:
+            raise RuntimeError("此 borrower 沒有持有此 limiter 的 token")
+        acquired, cost = held
+        self._used -= cost
+        if self._keyed is not None:
+            self._keyed._borrowed_tokens -= cost
+        self._on_release(time.perf_counter() - acquired)
+        self._wake()
+
+    def _order(self) -> object:
+        """
+        回傳新等待者的排序 key (在等待者的 context 中呼叫)，越小越先取得 token。
+        相同 key 時依到達順序 (FIFO)。
+        """
+        return 0
+
+    def _on_release(self, held: float) -> None:
+        """
+        token 被釋放時呼叫。
+
+        Args:
+            held: 該呼叫持有 token 的秒數。
+        """
+
+    def _fits(self, cost: int) -> bool:
+        return self._used + cost <= self._total_tokens or self._used == 0
+
+    def _grant(self, borrower: object, cost: int) -> None:
+        self._borrowers[borrower] = (time.perf_counter(), cost)
+        self._used += cost
+        if self._keyed is not None:
+            self._keyed._borrowed_tokens += cost
+
+    def _wake(self) -> None:
+        # 依 heap 順序嚴格分配：頂端的呼叫放不下時不跳過，避免大型呼叫被餓死
+        waiters = self._waiters
+        while waiters:
+            waiter = waiters[0][2]
+            if waiter.cancelled:
+                heapq.heappop(waiters)
+                continue
+            if not self._fits(waiter.cost):
+                break
+            heapq.heappop(waiters)
+            self._waiting -= 1
+            self._grant(waiter.borrower, waiter.cost)
+            waiter.granted = True
+            waiter.event.set()
+
+    def _compact(self) -> None:
+        # 被取消的 waiter 過多時重建 heap，避免長期飽和時 heap 無限成長
+        if len(self._waiters) > 2 * self._waiting + 64:
+            self._waiters = [item for item in self._waiters if not item[2].cancelled]
+            heapq.heapify(self._waiters)
+
+
+class WeightedLimiter(BaseLimiter):
+    """
+    依呼叫權重分配 token 的 limiter。
+
+    每個呼叫占用的 token 數量由 `to_async(cost=...)` 決定，可以是固定值，
+    或由呼叫參數計算的函式。如此 limiter 的容量可以反映實際的資源用量
+    (例如記憶體或資料庫連線數)，而不只是呼叫次數。等待中的呼叫依到達順序取得 token，
+    排在前面的大型呼叫放不下時，後面的呼叫也會等待，以免大型呼叫被餓死。
+
+    Example:
+        >>> manager.regist_limiter("memory", WeightedLimiter(1024))  # 單位：MB
+        >>> @manager.to_async(limiter="memory", cost=lambda frame: frame.nbytes // 2**20 + 1)
+        >>> def transform(frame): ...
+    """
+
+
+class PriorityLimiter(BaseLimiter):
+    """
+    依優先權分配 token 的 limiter。
+
+    等待中的呼叫依優先權 (數值越大越優先) 取得 token，相同優先權時依到達順序。
+    優先權由 `priority()` context manager 或 `to_async(priority=...)` 設定，
+    未設定時為 0。注意：持續有高優先權呼叫時，低優先權呼叫可能會一直等待。
+
+    Example:
+        >>> manager.regist_limiter("db", PriorityLimiter(8))
+        >>> @manager.to_async(limiter="db", priority=-1)
+        >>> def batch_job(): ...
+        >>>
+        >>> with priority(10):
+        >>>     await interactive_query()
+    """
+    def _order(self) -> object:
+        return -current_priority()
+
+
+class AdaptiveLimiter(BaseLimiter):
+    """
+    依觀測到的延遲自動調整容量的 limiter (AIMD)。
+
+    每個呼叫結束時，以其持有 token 的時間更新延遲的指數移動平均，並與近期的
+    最低延遲 (baseline) 比較：
+    - 延遲維持平穩 (不超過 baseline × tolerance) 且容量已被充分使用時，
+      容量以每輪約 +1 的速度加性成長。
+    - 延遲明顯上升時，容量乘以 backoff 倍率下降 (每個延遲週期最多下降一次)。
+
+    Example:
+        >>> manager.regist_limiter("db", AdaptiveLimiter(8, min_capacity=2, max_capacity=64))
+        >>> @manager.to_async(limiter="db")
+        >>> def query(sql: str): ...
+    """
+    def __init__(
+        self,
+        initial: int,
+        *,
+        min_capacity: int = 1,
+        max_capacity: int = 1000,
+        tolerance: float = 2.0,
+        backoff: float = 0.9,
+        smoothing: float = 0.2,
+    ):
+        """
+        Args:
+            initial: 初始容量。
+            min_capacity: 容量下限。
+            max_capacity: 容量上限。
+            tolerance: 延遲超過 baseline 多少倍時視為過載。
+            backoff: 過載時容量乘上的倍率 (0 < backoff < 1)。
+            smoothing: 延遲移動平均的權重 (0 < smoothing <= 1)，越大反應越快。
+
+        Raises:
+            ValueError: 參數不合理。
+        """
+        if not 1 <= min_capacity <= initial <= max_capacity:
+            raise ValueError("必須滿足 1 <= min_capacity <= initial <= max_capacity")
+        if tolerance <= 1:
+            raise ValueError("tolerance 必須大於 1")
+        if not 0 < backoff < 1:
+            raise ValueError("backoff 必須介於 0 與 1 之間")
+        if not 0 < smoothing <= 1:
+            raise ValueError("smoothing 必須介於 0 與 1 之間")
+        super().__init__(initial)
+        self.min_capacity = min_capacity
+        self.max_capacity = max_capacity
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.smoothing = smoothing
+        self._limit = float(initial)
+        self._latency: float | None = None
+        self._baseline: float | None = None
+        self._last_sample = 0.0
+        self._last_decrease = 0.0
+
+    @property
+    def latency(self) -> float | None:
+        """
+        延遲的指數移動平均 (秒)；尚無資料時為 None。
+        """
+        return self._latency
+
+    @property
+    def baseline(self) -> float | None:
+        """
+        作為比較基準的近期最低延遲 (秒)；尚無資料時為 None。
+        """
+        return self._baseline
+
+    def _on_release(self, held: float) -> None:
+        now = time.perf_counter()
+        if self._latency is None:
+            self._latency = self._baseline = held
+            self._last_sample = now
+            return
+
+        self._latency += self.smoothing * (held - self._latency)
+        # baseline 取近期最低延遲，並以每秒 1% 的速度上漂，避免永遠停在一次偶然的極低值
+        drift = 1 + _BASELINE_DRIFT * (now - self._last_sample)
+        self._baseline = min(self._baseline * drift, held)
+        self._last_sample = now
+
+        if self._latency > self._baseline * self.tolerance:
+            if now - self._last_decrease >= self._latency:
+                self._limit = max(self.min_capacity, self._limit * self.backoff)
+                self._last_decrease = now
+        elif self._used + 1 >= int(self._limit):
+            self._limit = min(self.max_capacity, self._limit + 1 / self._limit)
+
+        if int(self._limit) != self._total_tokens:
+            self.total_tokens = int(self._limit)
+
+
+class HierarchicalLimiter(BaseLimiter):
+    """
+    具有上層 limiter 的子 limiter，例如「全部最多 64 個、每個租戶最多 8 個」。
+
+    取得 token 時一律先取得自己的 token、再取得上層的 token (由葉往根的固定順序)，
+    因此多層、多個子 limiter 共用同一個上層時也不會互相死結；等待上層期間只會
+    占住同一個子 limiter 的名額，不影響其他子 limiter。任何一步被取消時，
+    已取得的 token 都會被釋放。上層也可以是另一個 HierarchicalLimiter，形成多層結構。
+
+    Example:
+        >>> with manager.create_limiter("db", 64):
+        >>>     manager.regist_limiter("db:tenant-a", HierarchicalLimiter(8, parent=manager.get_limiter("db")))
+        >>>     # 或
+        >>>     with manager.create_limiter("db:tenant-b", 8, parent="db"):
+        >>>         ...
+    """
+    def __init__(self, total_tokens: float, parent: AnyLimiter):
+        """
+        Args:
+            total_tokens: 此子 limiter 的容量。
+            parent: 上層 limiter。
+        """
+        super().__init__(total_tokens)
+        self.parent = parent
+
+    async def acquire_on_behalf_of(self, borrower: object, cost: int = 1) -> None:
+        await super().acquire_on_behalf_of(borrower, cost)
+        try:
+            if cost == 1:
+                await self.parent.acquire_on_behalf_of(borrower)
+            elif isinstance(self.parent, BaseLimiter):
+                await self.parent.acquire_on_behalf_of(borrower, cost)
+            else:
+                raise TypeError(
+                    f"上層 {type(self.parent).__name__} 不支援 cost，請改用自訂 limiter"
+                )
+        except BaseException:
+            self._release(borrower)
+            raise
+
+    def release_on_behalf_of(self, borrower: object) -> None:
+        try:
+            self.parent.release_on_behalf_of(borrower)
+        finally:
+            self._release(borrower)
+
+
+class KeyedLimiter:
+    """
+    依 key 動態建立的 limiter 集合，例如每個租戶各自一個 limiter。
+
+    第一次用到某個 key 時才以 factory 建立 limiter；閒置 (沒有借出 token 也沒有
+    等待者) 超過 `idle_timeout` 秒，或數量超過 `max_keys` 時，最久未使用的閒置
+    limiter 會被移除，因此記憶體用量有上限。使用中的 limiter 不會被移除，
+    所以全部都在使用中時數量可以暫時超過 `max_keys`。以 `hold()` 取得的 limiter
+    在離開 context 前同樣不會被移除。
+
+    透過 `AsyncManager.regist_keyed_limiter(prefix, ...)` 註冊後，以該前綴開頭的
+    limiter 名稱 (例如 "tenant:42") 都會由此集合提供。
+
+    Example:
+        >>> manager.regist_keyed_limiter("tenant:", KeyedLimiter(8, max_keys=50_000))
+        >>> @manager.to_async(limiter=lambda *a, tenant, **kw: f"tenant:{tenant}")
+        >>> def query(sql: str, *, tenant: str): ...
+    """
+    def __init__(
+        self,
+        max_worker: int,
+        *,
+        max_keys: int = 10_000,
+        idle_timeout: float = 300.0,
+        factory: Callable[[], BaseLimiter] | None = None,
+    ):
+        """
+        Args:
+            max_worker: 每個 key 的 limiter 容量 (未指定 factory 時使用)。
+            max_keys: 最多保留的 limiter 數量。
+            idle_timeout: 閒置多少秒後移除 limiter。
+            factory: 建立 limiter 的函式，例如
+                     `lambda: HierarchicalLimiter(8, parent=db)`；預設為容量 max_worker 的 FIFO limiter。
+
+        Raises:
+            ValueError: max_keys 小於 1 或 idle_timeout 不是正數。
+        """
+        if max_keys < 1:
+            raise ValueError("max_keys 必須大於等於 1")
+        if idle_timeout <= 0:
+            raise ValueError("idle_timeout 必須為正數")
+        self.max_worker = max_worker
+        self.max_keys = max_keys
+        self.idle_timeout = idle_timeout
+        self._factory = factory or (lambda: BaseLimiter(max_worker))
+        # key -> (limiter, 最後使用時間)，依最後使用時間排序 (LRU)
+        self._limiters: OrderedDict[str, tuple[BaseLimiter, float]] = OrderedDict()
+        # key -> 以 hold() 持有中的呼叫數
+        self._holds: dict[str, int] = {}
+        # 所有 limiter 的容量與借出總和，由各 limiter 在變動時更新
+        self._total_tokens: float = 0
+        self._borrowed_tokens: float = 0
+
+    @property
+    def total_tokens(self) -> float:
+        """
+        目前所有 limiter 的容量總和。
+        """
+        return self._total_tokens
+
+    @property
+    def borrowed_tokens(self) -> float:
+        """
+        目前所有 limiter 已借出的 token 總和。
+        """
+        return self._borrowed_tokens
+
+    def get(self, key: str) -> BaseLimiter:
+        """
+        取得 key 對應的 limiter，不存在時建立，並順便移除過期的閒置 limiter。
+
+        Args:
+            key: limiter 的 key (完整名稱)。
+
+        Returns:
+            BaseLimiter: key 對應的 limiter。
+        """
+        now = time.monotonic()
+        entry = self._limiters.get(key)
+        if entry is None:
+            limiter = self._factory()
+            limiter._keyed = self
+            self._total_tokens += limiter.total_tokens
+        else:
+            limiter = entry[0]
+            self._limiters.move_to_end(key)
+        self._limiters[key] = (limiter, now)
+        self._evict(key, now)
+        return limiter
+
+    @contextmanager
+    def hold(self, key: str) -> Iterator[BaseLimiter]:
+        """
+        取得 key 對應的 limiter，並在 context 內保留它不被移除。
+
+        呼叫在取得 token 之前可能還需要等待 (例如速率限制)，期間 limiter 沒有借出
+        token 也沒有等待者；若此時被移除，同一個 key 的下一個呼叫會拿到新的 limiter，
+        讓每個 key 的上限失效。AsyncManager 在整個呼叫期間都以此方式持有 limiter。
+
+        Args:
+            key: limiter 的 key (完整名稱)。
+
+        Yields:
+            BaseLimiter: key 對應的 limiter。
+        """
+        limiter = self.get(key)
+        self._holds[key] = self._holds.get(key, 0) + 1
+        try:
+            yield limiter
+        finally:
+            holds = self._holds[key] - 1
+            if holds:
+                self._holds[key] = holds
+            else:
+                del self._holds[key]
+                if key in self._limiters:
+                    self._limiters[key] = (limiter, time.monotonic())
+                    self._limiters.move_to_end(key)
+
+    def __len__(self) -> int:
+        return len(self._limiters)
+
+    def _evict(self, keep: str, now: float) -> None:
+        # 從最久未使用的一端開始檢查；使用中的 limiter 移到尾端，讓檢查維持攤銷 O(1)
+        limiters = self._limiters
+        for _ in range(len(limiters)):
+            key, (limiter, last_used) = next(iter(limiters.items()))
+            if key == keep:
+                return
+            over_capacity = len(limiters) > self.max_keys
+            if not over_capacity and now - last_used < self.idle_timeout:
+                return
+            if limiter.borrowed_tokens or limiter.waiting or key in self._holds:
+                limiters.move_to_end(key)
+                limiters[key] = (limiter, now)
+                continue
+            del limiters[key]
+            limiter._keyed = None
+            self._total_tokens -= limiter.total_tokens
+
+
+class RateLimiter:
+    """
+    Token bucket 速率限制器，限制每秒的呼叫次數 (而非並發數)。
+
+    bucket 以 `rate` 的速度補充 token，最多累積 `burst` 個。token 不足的呼叫會
+    預約下一個可用的時間點，並在 Event Loop 上 sleep (不占用 worker thread)，
+    因此等待者依到達順序放行。可與容量 limiter 同時使用，見 `to_async(rate_limiter=...)`。
+
+    Example:
+        >>> manager.regist_rate_limiter("github", RateLimiter(rate=10, burst=20))
+        >>> @manager.to_async(limiter="http", rate_limiter="github")
+        >>> def fetch(url: str): ...
+    """
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        Args:
+            rate: 每秒補充的 token 數量。
+            burst: bucket 最多可累積的 token 數量 (允許的瞬間突發量)。
+
+        Raises:
+            ValueError: rate 不是正數或 burst 小於 1。
+        """
+        if rate <= 0:
+            raise ValueError("rate 必須為正數")
+        if burst < 1:
+            raise ValueError("burst 必須大於等於 1")
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated: float | None = None
+
+    @property
+    def tokens(self) -> float:
+        """
+        目前 bucket 中的 token 數量；為負數時表示已有呼叫預約了未來的 token。
+        """
+        return self._tokens
+
+    async def acquire(self, cost: int = 1) -> None:
+        """
+        取得 token；不足時在 Event Loop 上等待到預約的時間點。
+
+        Args:
+            cost: 此呼叫消耗的 token 數量。
+        """
+        now = anyio.current_time()
+        if self._updated is not None:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+        self._tokens -= cost
+        if self._tokens >= 0:
+            await anyio.lowlevel.checkpoint()
+            return
+
+        try:
+            await anyio.sleep(-self._tokens / self.rate)
+        except BaseException:
+            # 取消時退還預約的 token，讓後續呼叫可以使用
+            self._tokens += cost
+            raise
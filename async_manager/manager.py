@@ -1,7 +1,55 @@
 import anyio
-from typing import Callable, Awaitable, overload
+import importlib
+import inspect
+import math
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict
+import anyio.abc
+import anyio.from_thread
+import anyio.lowlevel
+import anyio.to_interpreter
+import anyio.to_process
+from typing import AsyncIterable, AsyncIterator, Callable, Awaitable, Hashable, Iterable, Literal, overload
 from functools import partial, wraps
-from contextlib import contextmanager
+from contextlib import asynccontextmanager, contextmanager
+
+from .breaker import CircuitBreaker
+from .cache import TTLCache
+from .cancellation import CancelToken, _call_with_token
+from .deadlines import _deadline
+from .exceptions import CircuitOpen, ExecutionTimeout, LimiterOverloaded, OperationCancelled, QueueTimeout
+from .limiters import AnyLimiter, BaseLimiter, HierarchicalLimiter, KeyedLimiter, RateLimiter, _priority
+from .metrics import FunctionStats, LimiterStats
+from .pool import WorkerPool, _WorkItem, _prestart
+from ._runtime import RuntimeInfo, available_cores, is_free_threaded
+
+_MISSING = object()
+
+# `_make_key` 中分隔位置參數與關鍵字參數的標記
+_KWD_MARK = object()
+
+type Backend = Literal["thread", "process", "interpreter"]
+
+type ShedPolicy = Literal["reject", "drop_oldest"]
+
+type BoundLimiter = tuple[
+    AnyLimiter | None, LimiterStats | None, WorkerPool | None, _Shedder | None, _Circuit | None
+]
+
+_RUNNERS: dict[Backend, Callable[..., Awaitable]] = {
+    "thread": anyio.to_thread.run_sync,
+    "process": anyio.to_process.run_sync,
+    "interpreter": anyio.to_interpreter.run_sync,
+}
+
+_DEFAULT_LIMITERS: dict[Backend, Callable[[], anyio.CapacityLimiter]] = {
+    "thread": anyio.to_thread.current_default_thread_limiter,
+    "process": anyio.to_process.current_default_process_limiter,
+    "interpreter": anyio.to_interpreter.current_default_interpreter_limiter,
+}
 
 class AsyncManager:
     """
@@ -10,22 +58,169 @@ class AsyncManager:
     這個類別維護了一組命名的 `CapacityLimiter`，並提供裝飾器將同步函式轉換為
     在 Thread Pool 中運行的非同步函式 (Awaitable)。
     """
-    def __init__(self):
+    def __init__(self, default_capacity: int | None = None):
         """
         初始化 AsyncManager。
-        建立一個空的 limiter 儲存庫。
+        建立一個空的 limiter 儲存庫，並偵測目前是否為 free-threaded (no-GIL) 建置。
+
+        Args:
+            default_capacity: 未指定 limiter 時，執行緒後端的並發上限。
+                    - None: 自動決定。free-threaded 建置下使用可用核心數
+                      (執行緒可真正平行運行)；一般建置沿用 anyio 的預設執行緒池上限。
+                    - int: 明確指定的上限。
+        """
+        self._limiter: dict[str, AnyLimiter] = {}
+        self._stats: dict[str, LimiterStats] = {}
+        self._rate_limiter: dict[str, RateLimiter] = {}
+        self._keyed_limiter: dict[str, KeyedLimiter] = {}
+        self._pools: dict[str, WorkerPool] = {}
+        self._shedders: dict[str, _Shedder] = {}
+        self._breakers: dict[str, _Circuit] = {}
+        # 沒有專屬 pool 的 `to_async_iter` 在此執行；並發數由 limiter 控制，
+        # 與 anyio 的預設執行緒池一樣不另設執行緒上限
+        self._iter_pool = WorkerPool(sys.maxsize, thread_name_prefix="async-manager-iter")
+        # 統計資料由被裝飾的函式持有，函式被回收後 (例如 `map` 建立的暫時函式) 自動移除
+        self._functions: weakref.WeakValueDictionary[str, FunctionStats] = weakref.WeakValueDictionary()
+        # 具名 limiter 由 AsyncManager 自行取得 (以便統計)，交給 run_sync 時改用不設限的 limiter
+        self._passthrough = anyio.CapacityLimiter(math.inf)
+        # 每次註冊表變動時遞增，讓已綁定的具名 limiter 知道需要重新解析
+        self._version = 0
+        self._free_threaded = is_free_threaded()
+
+        if default_capacity is None and self._free_threaded:
+            default_capacity = available_cores()
+        self._default_limiter: anyio.CapacityLimiter | None = (
+            anyio.CapacityLimiter(default_capacity)
+            if default_capacity is not None
+            else None
+        )
+
+    async def warm_up(
+        self,
+        *,
+        default_threads: int | None = None,
+        iter_threads: int = 0,
+        initializer: Callable[[], object] | None = None,
+    ) -> None:
         """
-        self._limiter: dict[str, anyio.CapacityLimiter] = {}
+        預先建立預設執行緒池與各具名 limiter 專屬執行緒池 (`WorkerPool`) 的執行緒，
+        避免部署後第一批呼叫因建立執行緒而產生延遲尖峰。
+
+        必須在之後處理請求的同一個 Event Loop 中呼叫 (例如應用程式的 lifespan)，
+        因為 anyio 的預設執行緒池屬於各自的 Event Loop。
+
+        Args:
+            default_threads: 預設執行緒池要預先建立的執行緒數，預設為預設 limiter 的容量
+                    (見 `runtime_info()`)。沒有專屬執行緒池的具名 limiter 也使用這些執行緒。
+            iter_threads: `to_async_iter` 的執行緒池要預先建立的執行緒數 (沒有專屬執行緒池時使用)。
+            initializer: 在每個被預熱的執行緒中執行一次的函式 (例如建立連線、載入模型)。
+
+        Example:
+            >>> await manager.warm_up(initializer=load_model)
+        """
+        if default_threads is None:
+            default_threads = int(
+                (self._default_limiter or anyio.to_thread.current_default_thread_limiter()).total_tokens
+            )
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(
+                partial(
+                    _prestart,
+                    anyio.to_thread.run_sync,
+                    default_threads,
+                    initializer,
+                    limiter = self._passthrough,
+                )
+            )
+            for pool in self._pools.values():
+                tg.start_soon(pool.warm_up, None, initializer)
+            tg.start_soon(self._iter_pool.warm_up, iter_threads, initializer)
+
+    @asynccontextmanager
+    async def lifespan(self, app: object = None):
+        """
+        啟動時呼叫 `warm_up()` 的 lifespan，可直接交給 FastAPI / Starlette。
+
+        Args:
+            app: ASGI 應用程式 (未使用，僅為符合 lifespan 的呼叫方式)。
+
+        Example:
+            >>> app = FastAPI(lifespan=manager.lifespan)
+        """
+        await self.warm_up()
+        yield
+
+    def runtime_info(self) -> RuntimeInfo:
+        """
+        回報此 AsyncManager 採用的執行模式。
+
+        Returns:
+            RuntimeInfo: 包含 threading 模式 ("free-threaded" 或 "gil")
+            與預設執行緒池的並發上限。
+
+        Example:
+            >>> AsyncManager().runtime_info()
+            RuntimeInfo(threading_mode='gil', default_thread_capacity=None)
+        """
+        return RuntimeInfo(
+            threading_mode="free-threaded" if self._free_threaded else "gil",
+            default_thread_capacity=(
+                int(self._default_limiter.total_tokens)
+                if self._default_limiter is not None
+                else None
+            ),
+        )
     
-    def regist_limiter(self, name: str, limiter: anyio.CapacityLimiter):
+    def regist_limiter(
+        self,
+        name: str,
+        limiter: AnyLimiter,
+        *,
+        pool: WorkerPool | None = None,
+        max_waiting: int | None = None,
+        shed: ShedPolicy = "reject",
+        breaker: CircuitBreaker | None = None,
+    ):
         """
         註冊一個命名的 CapacityLimiter。
 
         Args:
             name: Limiter 的名稱 (ID)。
-            limiter: anyio.CapacityLimiter 實例。
+            limiter: anyio.CapacityLimiter 或 `async_manager.limiters` 中的自訂 limiter
+                    (例如 `AdaptiveLimiter`)。
+            pool: 此 limiter 專屬的執行緒池。指定後，使用此 limiter 的 "thread" 後端呼叫
+                    只會在該執行緒池中執行，與其他工作負載的執行緒隔離。
+            max_waiting: 最多允許多少個呼叫等待此 limiter；None 表示不限制。
+                    佇列已滿時依 shed 處理，被捨棄的呼叫拋出 `LimiterOverloaded`。
+            shed: 佇列已滿時的處理方式：
+                    - "reject": 立即拒絕新的呼叫 (預設)。
+                    - "drop_oldest": 擠出等待最久的呼叫，讓新的呼叫排入佇列。
+            breaker: 此 limiter 的斷路器。開啟時呼叫在取得 limiter 之前即被拒絕，
+                    並拋出 `CircuitOpen`。
+
+        Raises:
+            ValueError: max_waiting 小於 0，或 shed 不是支援的值。
         """
+        if max_waiting is not None and max_waiting < 0:
+            raise ValueError("max_waiting 必須大於等於 0")
+        if shed not in ("reject", "drop_oldest"):
+            raise ValueError(f"不支援的 shed：{shed!r}，可用值為 ('reject', 'drop_oldest')")
         self._limiter[name] = limiter
+        self._stats[name] = LimiterStats(limiter)
+        if max_waiting is None:
+            self._shedders.pop(name, None)
+        else:
+            self._shedders[name] = _Shedder(name, max_waiting, shed, self._stats[name])
+        if breaker is None:
+            self._breakers.pop(name, None)
+        else:
+            self._breakers[name] = _Circuit(name, breaker, self._stats[name])
+        old_pool = self._pools.pop(name, None)
+        if old_pool is not None and old_pool is not pool:
+            old_pool.close()
+        if pool is not None:
+            self._pools[name] = pool
+        self._version += 1
     
     def unregist_limiter(self, name: str):
         """
@@ -35,8 +230,41 @@ class AsyncManager:
             name: 要移除的 Limiter 名稱。
         """
         self._limiter.pop(name, None)
+        self._stats.pop(name, None)
+        self._shedders.pop(name, None)
+        self._breakers.pop(name, None)
+        pool = self._pools.pop(name, None)
+        if pool is not None:
+            # 執行中的工作照常完成，之後執行緒陸續結束
+            pool.close()
+        self._version += 1
     
-    def get_limiter(self, name: str) -> anyio.CapacityLimiter | None:
+    def get_pool(self, name: str) -> WorkerPool | None:
+        """
+        取得指定名稱的 limiter 專屬的執行緒池。
+
+        Args:
+            name: Limiter 名稱。
+
+        Returns:
+            WorkerPool | None: 如果該 limiter 有專屬執行緒池則回傳實例，否則回傳 None。
+        """
+        return self._pools.get(name, None)
+
+    def get_breaker(self, name: str) -> CircuitBreaker | None:
+        """
+        取得指定名稱的 limiter 的斷路器。
+
+        Args:
+            name: Limiter 名稱。
+
+        Returns:
+            CircuitBreaker | None: 如果該 limiter 有斷路器則回傳實例，否則回傳 None。
+        """
+        circuit = self._breakers.get(name, None)
+        return circuit.breaker if circuit is not None else None
+
+    def get_limiter(self, name: str) -> AnyLimiter | None:
         """
         取得指定名稱的 CapacityLimiter。
 
@@ -48,8 +276,180 @@ class AsyncManager:
         """
         return self._limiter.get(name, None)
     
+    def regist_rate_limiter(self, name: str, limiter: RateLimiter):
+        """
+        註冊一個命名的 RateLimiter。
+
+        Args:
+            name: RateLimiter 的名稱 (ID)。
+            limiter: RateLimiter 實例。
+        """
+        self._rate_limiter[name] = limiter
+        self._version += 1
+
+    def unregist_rate_limiter(self, name: str):
+        """
+        取消註冊 (移除) 指定名稱的 RateLimiter。
+
+        Args:
+            name: 要移除的 RateLimiter 名稱。
+        """
+        self._rate_limiter.pop(name, None)
+        self._version += 1
+
+    def get_rate_limiter(self, name: str) -> RateLimiter | None:
+        """
+        取得指定名稱的 RateLimiter。
+
+        Args:
+            name: RateLimiter 名稱。
+
+        Returns:
+            RateLimiter | None: 如果找到則回傳實例，否則回傳 None。
+        """
+        return self._rate_limiter.get(name, None)
+
+    @contextmanager
+    def create_rate_limiter(self, name: str, rate: float, burst: int = 1):
+        """
+        建立並管理一個 RateLimiter 生命週期的 Context Manager。
+
+        Args:
+            name: RateLimiter 名稱。
+            rate: 每秒允許的呼叫次數。
+            burst: 允許的瞬間突發量。
+
+        Yields:
+            RateLimiter: 建立的 RateLimiter 實例。
+
+        Example:
+            >>> with manager.create_rate_limiter("github", rate=10, burst=20):
+            >>>     pass
+        """
+        limiter = RateLimiter(rate, burst)
+        self.regist_rate_limiter(name, limiter)
+        try:
+            yield limiter
+        finally:
+            self.unregist_rate_limiter(name)
+
+    def regist_keyed_limiter(self, prefix: str, limiter: KeyedLimiter):
+        """
+        註冊一個依 key 動態建立 limiter 的 KeyedLimiter。
+
+        `to_async(limiter=<key 函式>)` 回傳的名稱若沒有對應的具名 limiter，
+        且以 prefix 開頭，就會由此 KeyedLimiter 提供。統計資料以 prefix 為名彙總。
+
+        Args:
+            prefix: limiter 名稱的前綴，例如 "tenant:"。
+            limiter: KeyedLimiter 實例。
+        """
+        self._keyed_limiter[prefix] = limiter
+        self._stats[prefix] = LimiterStats(limiter)
+        self._version += 1
+
+    def unregist_keyed_limiter(self, prefix: str):
+        """
+        取消註冊 (移除) 指定前綴的 KeyedLimiter。
+
+        Args:
+            prefix: 要移除的 KeyedLimiter 前綴。
+        """
+        self._keyed_limiter.pop(prefix, None)
+        self._stats.pop(prefix, None)
+        self._version += 1
+
     @contextmanager
-    def create_limiter(self, name: str, max_worker: int):
+    def create_keyed_limiter(
+        self,
+        prefix: str,
+        max_worker: int,
+        *,
+        max_keys: int = 10_000,
+        idle_timeout: float = 300.0,
+        parent: str | None = None,
+    ):
+        """
+        建立並管理一個 KeyedLimiter 生命週期的 Context Manager。
+
+        Args:
+            prefix: limiter 名稱的前綴，例如 "tenant:"。
+            max_worker: 每個 key 的最大並發工作數。
+            max_keys: 最多保留的 limiter 數量，超過時移除最久未使用的閒置 limiter。
+            idle_timeout: 閒置多少秒後移除 limiter。
+            parent: 上層 limiter 的名稱。指定時每個 key 都會建立 `HierarchicalLimiter`，
+                    共用同一個上層 limiter。
+
+        Yields:
+            KeyedLimiter: 建立的 KeyedLimiter 實例。
+
+        Raises:
+            RuntimeError: 上層 limiter 尚未註冊。
+
+        Example:
+            >>> # 全部最多 64 個，每個租戶最多 8 個
+            >>> with manager.create_limiter("db", 64), manager.create_keyed_limiter("tenant:", 8, parent="db"):
+            >>>     pass
+        """
+        factory = None
+        if parent is not None:
+            parent_limiter = self.get_limiter(parent)
+            if parent_limiter is None:
+                raise RuntimeError(
+                    f"Limiter {parent} 尚未註冊！"
+                )
+            factory = partial(HierarchicalLimiter, max_worker, parent_limiter)
+        limiter = KeyedLimiter(
+            max_worker,
+            max_keys=max_keys,
+            idle_timeout=idle_timeout,
+            factory=factory,
+        )
+        self.regist_keyed_limiter(prefix, limiter)
+        try:
+            yield limiter
+        finally:
+            self.unregist_keyed_limiter(prefix)
+
+    def stats(self) -> dict[str, LimiterStats]:
+        """
+        取得所有具名 limiter 的統計資料。
+
+        每個具名 limiter 都會記錄目前執行中 / 等待中的呼叫數，以及等待取得
+        limiter 與實際執行的時間分佈 (Histogram)，可作為調整 `max_worker` 的依據。
+
+        Returns:
+            dict[str, LimiterStats]: limiter 名稱對應的統計資料 (即時更新的物件)。
+
+        Example:
+            >>> stats = manager.stats()["db"]
+            >>> stats.in_flight, stats.waiting, stats.wait_time.quantile(0.99)
+        """
+        return dict(self._stats)
+
+    def function_stats(self) -> dict[str, FunctionStats]:
+        """
+        取得所有經由此 AsyncManager 裝飾的函式統計資料。
+
+        Returns:
+            dict[str, FunctionStats]: 函式完整名稱 (`模組.qualname`) 對應的統計資料。
+            不同函式的名稱相同時 (例如由同一個工廠函式建立的閉包)，之後裝飾的函式
+            名稱會加上 `#2`、`#3` 等後綴。
+        """
+        return dict(self._functions)
+
+    @contextmanager
+    def create_limiter(
+        self,
+        name: str,
+        max_worker: int,
+        *,
+        parent: str | None = None,
+        pool: WorkerPool | bool = False,
+        max_waiting: int | None = None,
+        shed: ShedPolicy = "reject",
+        breaker: CircuitBreaker | None = None,
+    ):
         """
         建立並管理一個 Limiter 生命週期的 Context Manager。
         
@@ -58,18 +458,54 @@ class AsyncManager:
         Args:
             name: Limiter 名稱。
             max_worker: 最大並發工作數。
+            parent: 上層 limiter 的名稱。指定時會建立 `HierarchicalLimiter`，
+                    每個呼叫需同時取得此 limiter 與上層 limiter 的名額。
+                    上層 limiter 在建立時解析，之後不會隨註冊表變動。
+            pool: 此 limiter 專屬的執行緒池。True 表示建立最多 max_worker 個執行緒、
+                    以 name 為執行緒名稱前綴的 `WorkerPool`；也可以傳入自訂的 `WorkerPool`
+                    (例如指定 min_threads 或 idle_timeout)。離開 context 時執行緒池會被關閉。
+            max_waiting: 最多允許多少個呼叫等待此 limiter，見 `regist_limiter`。
+            shed: 等待佇列已滿時的處理方式，見 `regist_limiter`。
+            breaker: 此 limiter 的斷路器，見 `regist_limiter`。
         
         Yields:
-             anyio.CapacityLimiter: 建立的 limiter 實例。
+             anyio.CapacityLimiter | HierarchicalLimiter: 建立的 limiter 實例。
+
+        Raises:
+            RuntimeError: 上層 limiter 尚未註冊。
         
         Example:
             >>> manager = AsyncManager()
             >>> with manager.create_limiter("docker", 10):
             >>>     # limiter 在這裡可用
             >>>     pass
+
+            >>> # 全部最多 64 個，租戶 a 最多 8 個
+            >>> with manager.create_limiter("db", 64), manager.create_limiter("db:a", 8, parent="db"):
+            >>>     pass
+
+            >>> # 資料庫呼叫使用自己的 16 個執行緒，不與其他工作共用
+            >>> with manager.create_limiter("db", 16, pool=True):
+            >>>     pass
+
+            >>> # 最近的呼叫半數失敗時暫停送出 30 秒
+            >>> with manager.create_limiter("db", 16, breaker=CircuitBreaker(open_duration=30)):
+            >>>     pass
         """
-        limiter = anyio.CapacityLimiter(max_worker)
-        self.regist_limiter(name, limiter)
+        if parent is None:
+            limiter = anyio.CapacityLimiter(max_worker)
+        else:
+            parent_limiter = self.get_limiter(parent)
+            if parent_limiter is None:
+                raise RuntimeError(
+                    f"Limiter {parent} 尚未註冊！"
+                )
+            limiter = HierarchicalLimiter(max_worker, parent_limiter)
+        if pool is True:
+            pool = WorkerPool(max_worker, thread_name_prefix=name)
+        self.regist_limiter(
+            name, limiter, pool=pool or None, max_waiting=max_waiting, shed=shed, breaker=breaker
+        )
         try:
             yield limiter
         finally:
@@ -79,21 +515,56 @@ class AsyncManager:
     def to_async[T, **P](self, func: Callable[P, T]) -> Callable[P, Awaitable[T]]:...
 
     @overload
-    def to_async[T, **P](self, func: None = None, *, limiter: str) -> Callable[Callable[P, T], Callable[P, Awaitable[T]]]:...
-
-    @overload
-    def to_async[T, **P](self, func: None = None, *, limiter: anyio.CapacityLimiter) -> Callable[Callable[P, T], Callable[P, Awaitable[T]]]:...
+    def to_async[T, **P](self, func: None = None, *, limiter: str | AnyLimiter | Callable[P, str] | None = None, backend: Backend = "thread", coalesce: bool = False, cache: TTLCache | None = None, priority: int | None = None, cost: int | Callable[P, int] | None = None, rate_limiter: str | RateLimiter | None = None, timeout: float | None = None, queue_timeout: float | None = None, cancellable: bool = False) -> Callable[Callable[P, T], Callable[P, Awaitable[T]]]:...
 
-    def to_async[T, **P](self, func: Callable[P, T] | None = None, *, limiter: str | anyio.CapacityLimiter | None = None):
+    def to_async[T, **P](self, func: Callable[P, T] | None = None, *, limiter: str | AnyLimiter | Callable[P, str] | None = None, backend: Backend = "thread", coalesce: bool = False, cache: TTLCache | None = None, priority: int | None = None, cost: int | Callable[P, int] | None = None, rate_limiter: str | RateLimiter | None = None, timeout: float | None = None, queue_timeout: float | None = None, cancellable: bool = False):
         """
         將同步函式轉換為非同步函式
         
         Args:
             func: 要轉換的同步函式
             limiter: 可以是：
-                    - None: 使用預設執行緒池（推薦）
+                    - None: 使用預設執行緒池（推薦），上限見 `runtime_info()`
                     - CapacityLimiter 物件: 直接使用該 limiter（推薦用於簡單場景）
+                    - 自訂 limiter 物件 (例如 `AdaptiveLimiter`): 由 AsyncManager 自行取得 token
                     - str: limiter 名稱（推薦用於 FastAPI，需先註冊）
+                    - key 函式: 接收與原函式相同的參數並回傳 limiter 名稱，每次呼叫時解析。
+                      名稱沒有對應的具名 limiter 時，改由前綴相符的 `KeyedLimiter` 依名稱
+                      動態建立 (見 `create_keyed_limiter`)，適合每個租戶各自限流。
+            backend: 執行後端：
+                    - "thread": 在執行緒池中執行（預設，適合 IO 密集型工作）
+                    - "process": 在 worker 行程池中執行（適合 CPU 密集型工作，
+                      可繞過 GIL 使用多核心）。函式與參數必須可被 pickle，
+                      且函式需定義在模組層級。
+                    - "interpreter": 在子直譯器池中執行（每個子直譯器擁有獨立的 GIL，
+                      啟動成本與記憶體用量都低於行程池）。限制與 "process" 相同，
+                      且函式只能使用支援子直譯器的模組（純 Python 最為安全）。
+            coalesce: 是否合併相同參數的並發呼叫 (single-flight)。
+                    啟用後，參數相同 (且皆可 hash) 的並發呼叫只會執行一次，
+                    所有等待者取得同一個結果物件或同一個例外。參數無法 hash 時照常執行。
+            cache: 結果快取 (例如 `TTLCache(maxsize, ttl)`)。命中時直接在 Event Loop
+                    上回傳，不會切換 thread 或取得 limiter；例外不會被快取。
+                    每個函式應使用各自的快取實例。
+            priority: 此函式呼叫的預設優先權 (數值越大越優先)，供 `PriorityLimiter` 使用。
+                    呼叫端以 `priority()` context manager 設定的值會優先採用。
+            cost: 每次呼叫占用的 token 數量，可以是固定值，或接收與原函式相同參數
+                    並回傳 token 數量的函式。只能搭配自訂 limiter (例如 `WeightedLimiter`)。
+            rate_limiter: 速率限制，可以是 RateLimiter 物件或已註冊的名稱。
+                    呼叫會先在 Event Loop 上等待速率限制，再取得 limiter，
+                    因此等待期間不會占用 limiter 或 worker thread。
+            timeout: 每次呼叫取得 limiter 後的執行期限 (秒)，逾時拋出 `ExecutionTimeout`。
+                    執行緒無法被中斷，逾時 (或被取消) 的執行緒會被放棄並在背景執行完畢，
+                    期間持續占用 limiter 的名額；"process" 後端則會終止 worker 行程。
+                    不支援 "interpreter" 後端。
+            queue_timeout: 每次呼叫等待速率限制與 limiter 的期限 (秒)，逾時拋出 `QueueTimeout`。
+                    呼叫端也可以用 `deadline()` 設定單次呼叫的整體期限，實際期限取較早者。
+            cancellable: 是否啟用協作式取消 (僅限 "thread" 後端)。啟用後呼叫端被取消或逾時時
+                    會立即返回，並通知函式透過 `checkpoint()` / `current_cancel_token()` 提早結束；
+                    函式結束前仍占用 limiter 的名額。
+
+        Raises:
+            ValueError: backend 不是支援的值、cost 小於 1，"interpreter" 後端指定了 timeout，
+                    或非 "thread" 後端啟用 cancellable。
         
         Examples:
             >>> # 方式一：無參數（最簡單）
@@ -111,29 +582,124 @@ class AsyncManager:
             >>> @to_async(limiter="docker")
             >>> def sync_func():
             >>>     pass
+
+            >>> # 方式四：CPU 密集型工作交給行程池
+            >>> @to_async(backend="process", limiter="cpu")
+            >>> def crunch(n: int) -> int:
+            >>>     return sum(i * i for i in range(n))
+
+            >>> # 方式五：依參數選擇 limiter，每個租戶各自限流
+            >>> @to_async(limiter=lambda *a, tenant, **kw: f"tenant:{tenant}")
+            >>> def query(sql: str, *, tenant: str): ...
         """
+        if backend not in _RUNNERS:
+            raise ValueError(
+                f"不支援的 backend：{backend!r}，可用值為 {tuple(_RUNNERS)}"
+            )
+        if isinstance(cost, int) and cost < 1:
+            raise ValueError("cost 必須大於等於 1")
+        if timeout is not None and backend == "interpreter":
+            raise ValueError("interpreter 後端無法中斷執行中的工作，不支援 timeout")
+        if cancellable and backend != "thread":
+            raise ValueError("cancellable 只支援 thread 後端")
+        run_sync = _RUNNERS[backend]
+        bounded = timeout is not None or queue_timeout is not None or cancellable
+
         def decorator(f: Callable[P, T]) -> Callable[P, Awaitable[T]]:
+            if backend == "thread":
+                call = f
+            else:
+                call = _worker_call(f)
+
+            key_limiter = limiter if _is_key_function(limiter) else None
+            current_limiter = None if key_limiter else self._bind_limiter(limiter, backend)
+            current_rate_limiter = self._bind_rate_limiter(rate_limiter)
+            counter = self._track_function(f, cache)
+            inflight: dict[Hashable, _Flight] = {}
+
+            async def execute(args: tuple, kwargs: dict) -> T:
+                if key_limiter is None:
+                    return await dispatch(args, kwargs, current_limiter())
+                # 整個呼叫期間持有 key 對應的 limiter，避免等待速率限制時被 KeyedLimiter 移除
+                with self._hold_key(key_limiter(*args, **kwargs), backend) as bound:
+                    return await dispatch(args, kwargs, bound)
+
+            async def dispatch(args: tuple, kwargs: dict, bound: BoundLimiter) -> T:
+                if bounded or _deadline.get() is not None:
+                    return await self._run_bounded(
+                        backend,
+                        partial(call, *args, **kwargs),
+                        bound,
+                        cost(*args, **kwargs) if callable(cost) else (cost or 1),
+                        counter,
+                        current_rate_limiter(),
+                        timeout,
+                        queue_timeout,
+                        CancelToken() if cancellable else None,
+                    )
+                return await self._run(
+                    run_sync,
+                    partial(call, *args, **kwargs),
+                    bound,
+                    cost(*args, **kwargs) if callable(cost) else (cost or 1),
+                    current_rate_limiter() if rate_limiter is not None else None,
+                )
+
+            async def execute_once(key: Hashable, args: tuple, kwargs: dict) -> T:
+                while (flight := inflight.get(key)) is not None:
+                    await flight.done.wait()
+                    if flight.abandoned:
+                        # 執行者在取得結果前被取消，改由等待者重新執行
+                        continue
+                    if flight.error is not None:
+                        raise flight.error
+                    return flight.result
+
+                flight = inflight[key] = _Flight()
+                try:
+                    flight.result = await execute(args, kwargs)
+                    return flight.result
+                except Exception as exc:
+                    flight.error = exc
+                    raise
+                except BaseException:
+                    flight.abandoned = True
+                    raise
+                finally:
+                    del inflight[key]
+                    flight.done.set()
+
+            async def invoke(args: tuple, kwargs: dict) -> T:
+                if not (coalesce or cache is not None):
+                    return await execute(args, kwargs)
+                if (key := _make_key(args, kwargs)) is None:
+                    return await execute(args, kwargs)
+
+                if cache is not None:
+                    result = cache.get(key, _MISSING)
+                    if result is not _MISSING:
+                        return result
+
+                if coalesce:
+                    result = await execute_once(key, args, kwargs)
+                else:
+                    result = await execute(args, kwargs)
+
+                if cache is not None:
+                    cache.set(key, result)
+                return result
+
             @wraps(f)
             async def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
-                actual_limiter: anyio.CapacityLimiter | None = None
-
-                match limiter:
-                    case str():
-                        actual_limiter = self.get_limiter(limiter)
-                        if actual_limiter is None:
-                            raise RuntimeError(
-                                f"Limiter {limiter} 尚未註冊！"
-                            )
-                    case anyio.CapacityLimiter():
-                        actual_limiter = limiter
-                    
-                    case _:
-                        actual_limiter = None
-                
-                return await anyio.to_thread.run_sync(
-                    partial(f, *args, **kwargs),
-                    limiter = actual_limiter,
-                )
+                counter.calls += 1
+                if priority is None or _priority.get() is not None:
+                    return await invoke(args, kwargs)
+
+                token = _priority.set(priority)
+                try:
+                    return await invoke(args, kwargs)
+                finally:
+                    _priority.reset(token)
             
             return wrapper
         
@@ -141,6 +707,1014 @@ class AsyncManager:
             return decorator(func)
         return decorator
 
+    def to_async_batch[A, R](
+        self,
+        *,
+        max_batch: int,
+        max_delay: float,
+        limiter: str | AnyLimiter | None = None,
+    ) -> Callable[[Callable[[list[A]], list[R]]], Callable[[A], Awaitable[R]]]:
+        """
+        將「批次版」同步函式轉換為逐筆呼叫的非同步函式 (Micro-batching)。
+
+        同時間到達的多個呼叫會被合併成一個批次，只在 worker thread 中呼叫一次
+        同步函式，再將結果依序分送回各個呼叫者。大量細小呼叫時可大幅減少
+        thread 切換與 limiter 取得的次數。
+
+        第一個進入批次的呼叫者負責送出批次：它會等到批次湊滿 `max_batch` 筆，
+        或等待 `max_delay` 秒後送出。送出期間該呼叫者不會被取消 (shielded)，
+        以免其他呼叫者的結果遺失。
+
+        Args:
+            max_batch: 單一批次的最大筆數，湊滿後立即送出。
+            max_delay: 批次開始後最多等待的秒數。
+            limiter: 與 `to_async` 相同，用於限制批次的並發數量。
+
+        Returns:
+            裝飾器。被裝飾的函式須接收 `list[A]` 並回傳等長的 `list[R]`，
+            裝飾後成為接收單一 `A` 並回傳 `R` 的非同步函式。
+
+        Raises:
+            ValueError: max_batch 小於 1 或 max_delay 為負數。
+
+        Example:
+            >>> @manager.to_async_batch(max_batch=100, max_delay=0.005)
+            >>> def lookup_many(keys: list[str]) -> list[int]:
+            >>>     return [table[k] for k in keys]
+            >>>
+            >>> value = await lookup_many("a")  # 與其他同時的呼叫合併執行
+        """
+        if max_batch < 1:
+            raise ValueError("max_batch 必須大於等於 1")
+        if max_delay < 0:
+            raise ValueError("max_delay 不可為負數")
+
+        def decorator(f: Callable[[list[A]], list[R]]) -> Callable[[A], Awaitable[R]]:
+            current_limiter = self._bind_limiter(limiter, "thread")
+            counter = self._track_function(f)
+            pending: _Batch | None = None
+
+            async def flush(batch: _Batch) -> None:
+                nonlocal pending
+                with anyio.move_on_after(max_delay):
+                    await batch.full.wait()
+                if pending is batch:
+                    pending = None
+
+                try:
+                    results = await self._run(
+                        anyio.to_thread.run_sync,
+                        partial(f, batch.items),
+                        current_limiter(),
+                    )
+                    if len(results) != len(batch.items):
+                        raise ValueError(
+                            f"{f.__qualname__} 回傳 {len(results)} 筆結果，"
+                            f"但批次有 {len(batch.items)} 筆輸入"
+                        )
+                    batch.results = results
+                except Exception as exc:
+                    batch.error = exc
+                finally:
+                    batch.done.set()
+
+            @wraps(f)
+            async def wrapper(item: A) -> R:
+                nonlocal pending
+                counter.calls += 1
+                batch = pending
+                is_leader = batch is None
+                if batch is None:
+                    batch = pending = _Batch()
+
+                index = len(batch.items)
+                batch.items.append(item)
+                if len(batch.items) >= max_batch:
+                    pending = None
+                    batch.full.set()
+
+                if is_leader:
+                    with anyio.CancelScope(shield=True):
+                        await flush(batch)
+                else:
+                    await batch.done.wait()
+
+                if batch.error is not None:
+                    raise batch.error
+                return batch.results[index]
+
+            return wrapper
+
+        return decorator
+
+    @overload
+    def to_async_iter[T, **P](self, func: Callable[P, Iterable[T]]) -> Callable[P, AsyncIterator[T]]:...
+
+    @overload
+    def to_async_iter[T, **P](self, func: None = None, *, limiter: str | AnyLimiter | None = None, batch_size: int = 64, prefetch: int = 2) -> Callable[[Callable[P, Iterable[T]]], Callable[P, AsyncIterator[T]]]:...
+
+    def to_async_iter[T, **P](self, func: Callable[P, Iterable[T]] | None = None, *, limiter: str | AnyLimiter | None = None, batch_size: int = 64, prefetch: int = 2):
+        """
+        將同步 generator (或回傳 iterable 的函式) 轉換為非同步迭代器。
+
+        整個 generator 在同一個 worker thread 中執行，產生的元素每 batch_size 筆
+        經由有界的 memory channel 送回 Event Loop，因此 thread 切換的成本由整批元素分攤，
+        而不是每筆一次。channel 最多暫存 prefetch 批，消費端處理較慢時 generator 會暫停。
+
+        limiter 在開始迭代時取得，直到 generator 結束 (或被關閉後執行緒真正結束) 才釋放。
+        具名 limiter 綁定了 `pool` 時 generator 在該執行緒池中執行，否則在 AsyncManager
+        自己的執行緒池中執行；兩者的執行緒都會在迭代之間重複使用
+        (可用 `warm_up(iter_threads=...)` 預熱)。提早結束迭代 (break 或取消) 時，
+        generator 會在送出下一批時停止並被關閉；generator 內可呼叫 `checkpoint()` 更早結束。
+
+        Args:
+            func: 要轉換的同步 generator 函式。
+            limiter: 與 `to_async` 相同 (不支援 key 函式)。斷路器不適用於此裝飾器。
+            batch_size: 每次送回 Event Loop 的元素數。generator 產生元素很慢時，
+                    較小的值可降低第一筆元素的延遲。
+            prefetch: channel 最多暫存的批數。
+
+        Returns:
+            裝飾器，或裝飾後回傳非同步迭代器的函式。
+
+        Raises:
+            ValueError: batch_size 小於 1，或 prefetch 小於 0。
+
+        Example:
+            >>> @manager.to_async_iter(limiter="db", batch_size=500)
+            >>> def rows(sql: str):
+            >>>     with connect() as conn:
+            >>>         yield from conn.execute(sql)
+            >>>
+            >>> async for row in rows("SELECT * FROM events"):
+            >>>     handle(row)
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size 必須大於等於 1")
+        if prefetch < 0:
+            raise ValueError("prefetch 不可為負數")
+
+        def decorator(f: Callable[P, Iterable[T]]) -> Callable[P, AsyncIterator[T]]:
+            current_limiter = self._bind_limiter(limiter, "thread")
+            counter = self._track_function(f)
+
+            @wraps(f)
+            async def wrapper(*args: P.args, **kwargs: P.kwargs) -> AsyncIterator[T]:
+                counter.calls += 1
+                actual_limiter, stats, pool, shedder, _ = current_limiter()
+                if actual_limiter is None:
+                    actual_limiter = anyio.to_thread.current_default_thread_limiter()
+
+                borrower = object()
+                if stats is not None:
+                    stats.waiting += 1
+                start = anyio.current_time()
+                try:
+                    if shedder is not None:
+                        await shedder.acquire(actual_limiter, borrower, 1)
+                    else:
+                        await actual_limiter.acquire_on_behalf_of(borrower)
+                finally:
+                    if stats is not None:
+                        stats.waiting -= 1
+                acquired = anyio.current_time()
+                if stats is not None:
+                    stats.wait_time.observe(acquired - start)
+                    stats.in_flight += 1
+
+                send, receive = anyio.create_memory_object_stream[list | BaseException](prefetch)
+
+                def finish() -> None:
+                    send.close()
+                    actual_limiter.release_on_behalf_of(borrower)
+                    if stats is not None:
+                        stats.in_flight -= 1
+                        stats.run_time.observe(anyio.current_time() - acquired)
+
+                token = CancelToken()
+                job = partial(
+                    _produce,
+                    partial(f, *args, **kwargs),
+                    send,
+                    batch_size,
+                    finish,
+                    anyio.lowlevel.current_token(),
+                )
+
+                def done(work: _WorkItem) -> None:
+                    # 執行緒的 on_thread_start 失敗時 generator 不會執行，由此釋放 limiter 並結束 channel
+                    if work.error is not None:
+                        finish()
+
+                work = (pool or self._iter_pool)._enqueue(_call_with_token, (token, job), done)
+
+                try:
+                    with receive:
+                        async for batch in receive:
+                            if isinstance(batch, BaseException):
+                                raise batch
+                            for item in batch:
+                                yield item
+                    if work.error is not None:
+                        raise work.error
+                finally:
+                    # 提早結束時通知 generator 停止，limiter 由執行緒結束時釋放
+                    token.cancel()
+
+            return wrapper
+
+        if func is not None:
+            return decorator(func)
+        return decorator
+
+    @asynccontextmanager
+    async def map[A, R](
+        self,
+        func: Callable[[A], R] | Callable[[A], Awaitable[R]],
+        iterable: Iterable[A] | AsyncIterable[A],
+        *,
+        limiter: str | AnyLimiter | Callable[[A], str] | None = None,
+        backend: Backend = "thread",
+        max_in_flight: int | None = None,
+        ordered: bool = True,
+    ):
+        """
+        以有界的並發數對 iterable 的每個元素呼叫 func，並以非同步迭代器串流回傳結果。
+
+        輸入只在有空位時才逐筆讀取，同時存在的工作 (執行中與已完成但尚未被取用的結果)
+        最多 max_in_flight 個，因此處理大量輸入時記憶體用量只與視窗大小有關，
+        不會像 `gather` 一次建立所有 coroutine。
+
+        背景工作在 context 內執行：離開 context (包含提早 break 或拋出例外) 時，
+        尚未完成的工作會被取消。
+
+        Args:
+            func: 接收單一元素的同步函式；也可以傳入已經以 `to_async` 裝飾的非同步函式，
+                    此時直接呼叫，limiter 與 backend 不會再套用。
+            iterable: 輸入，可以是一般或非同步的 iterable。一般 iterable 在 Event Loop
+                    上讀取，不應在讀取時阻塞。
+            limiter: 與 `to_async` 相同 (包含具名 limiter 的統計、load shedding 與斷路器)。
+            backend: 與 `to_async` 相同。
+            max_in_flight: 同時存在的工作數上限。預設為 limiter 的容量；
+                    key 函式或容量不固定時為預設 limiter 的容量。
+            ordered: True 依輸入順序回傳結果；False 依完成順序回傳，
+                    較慢的元素不會阻塞後面的結果。
+
+        Yields:
+            AsyncIterator[R]: 結果的非同步迭代器。func 拋出的例外 (或讀取輸入時的例外)
+            會在取用到該元素時拋出。
+
+        Raises:
+            ValueError: max_in_flight 小於 1，或其他參數不合法 (見 `to_async`)。
+
+        Example:
+            >>> async with manager.map(resize, paths, limiter="cpu", ordered=False) as results:
+            >>>     async for image in results:
+            >>>         save(image)
+        """
+        if max_in_flight is not None and max_in_flight < 1:
+            raise ValueError("max_in_flight 必須大於等於 1")
+        if inspect.iscoroutinefunction(func):
+            call = func
+        else:
+            call = self.to_async(func, limiter=limiter, backend=backend)
+        if max_in_flight is None:
+            max_in_flight = self._capacity(limiter, backend)
+
+        window = anyio.Semaphore(max_in_flight)
+        send, receive = anyio.create_memory_object_stream[_Pending](math.inf)
+
+        async def work(pending: _Pending, item: A, stream: anyio.abc.ObjectSendStream[_Pending]) -> None:
+            with stream:
+                try:
+                    pending.result = await call(item)
+                except Exception as exc:
+                    pending.error = exc
+                pending.done.set()
+                if not ordered:
+                    stream.send_nowait(pending)
+
+        async def feed(tg: anyio.abc.TaskGroup) -> None:
+            is_async = isinstance(iterable, AsyncIterable)
+            items = aiter(iterable) if is_async else iter(iterable)
+            with send:
+                while True:
+                    # 先取得視窗的空位才讀取下一筆輸入
+                    await window.acquire()
+                    pending = _Pending()
+                    try:
+                        item = await anext(items) if is_async else next(items)
+                    except (StopIteration, StopAsyncIteration):
+                        return
+                    except Exception as exc:
+                        # 讀取輸入失敗時，在取用到此位置時拋出
+                        pending.error = exc
+                        pending.done.set()
+                        send.send_nowait(pending)
+                        return
+                    if ordered:
+                        send.send_nowait(pending)
+                    tg.start_soon(work, pending, item, send.clone())
+
+        async def results() -> AsyncIterator[R]:
+            with receive:
+                async for pending in receive:
+                    await pending.done.wait()
+                    if pending.error is not None:
+                        raise pending.error
+                    result = pending.result
+                    del pending
+                    window.release()
+                    yield result
+
+        error: Exception | None = None
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(feed, tg)
+            try:
+                yield results()
+            except Exception as exc:
+                # 在 task group 外重新拋出，避免被包成 ExceptionGroup
+                error = exc
+            finally:
+                tg.cancel_scope.cancel()
+        if error is not None:
+            raise error
+
+    def _capacity(
+        self,
+        limiter: str | AnyLimiter | Callable[..., str] | None,
+        backend: Backend,
+    ) -> int:
+        """
+        取得 limiter 目前的容量，作為 `map` 的預設並發視窗。
+        """
+        actual_limiter = None
+        if not _is_key_function(limiter):
+            actual_limiter = self._resolve_limiter(limiter, backend)[0]
+        if actual_limiter is None or not math.isfinite(actual_limiter.total_tokens):
+            actual_limiter = _DEFAULT_LIMITERS[backend]()
+        return max(1, int(actual_limiter.total_tokens))
+
+    def _track_function(self, f: Callable, cache: TTLCache | None = None) -> FunctionStats:
+        """
+        為被裝飾的函式建立統計資料，每次裝飾各自獨立；名稱已被其他函式使用時加上後綴。
+        """
+        base = name = f"{f.__module__}.{f.__qualname__}"
+        suffix = 1
+        while name in self._functions:
+            suffix += 1
+            name = f"{base}#{suffix}"
+        counter = self._functions[name] = FunctionStats(cache)
+        return counter
+
+    async def _run[T](
+        self,
+        run_sync: Callable[..., Awaitable[T]],
+        job: Callable[[], T],
+        bound: BoundLimiter,
+        cost: int = 1,
+        rate_limiter: RateLimiter | None = None,
+    ) -> T:
+        """
+        以指定後端執行 job。
+
+        具名 limiter 與自訂 limiter 由此處自行取得與釋放，並記錄等待與執行時間；
+        其餘情況直接交給後端的 limiter 參數處理。斷路器在等待速率限制與 limiter
+        之前檢查，開啟時直接拒絕。
+
+        Raises:
+            TypeError: 指定了 cost，但 limiter 不支援權重。
+            CircuitOpen: limiter 的斷路器已開啟。
+        """
+        limiter, stats, pool, shedder, circuit = bound
+        _check_cost(limiter, cost)
+        if stats is None:
+            if rate_limiter is not None:
+                await rate_limiter.acquire()
+            return await run_sync(job, limiter = limiter)
+
+        if circuit is not None:
+            circuit.admit()
+        try:
+            if rate_limiter is not None:
+                await rate_limiter.acquire()
+            borrower = object()
+            stats.waiting += 1
+            start = time.perf_counter()
+            try:
+                if shedder is not None:
+                    await shedder.acquire(limiter, borrower, cost)
+                elif cost == 1:
+                    await limiter.acquire_on_behalf_of(borrower)
+                else:
+                    await limiter.acquire_on_behalf_of(borrower, cost)
+            finally:
+                stats.waiting -= 1
+        except BaseException:
+            if circuit is not None:
+                circuit.breaker.forget()
+            raise
+        acquired = time.perf_counter()
+        stats.wait_time.observe(acquired - start)
+
+        stats.in_flight += 1
+        try:
+            if pool is not None:
+                result = await pool.run_sync(job)
+            else:
+                result = await run_sync(job, limiter = self._passthrough)
+        except BaseException as exc:
+            if circuit is not None:
+                circuit.breaker.record(time.perf_counter() - acquired, exc)
+            raise
+        else:
+            if circuit is not None:
+                circuit.breaker.record(time.perf_counter() - acquired)
+            return result
+        finally:
+            limiter.release_on_behalf_of(borrower)
+            stats.in_flight -= 1
+            stats.run_time.observe(time.perf_counter() - acquired)
+
+    async def _run_bounded[T](
+        self,
+        backend: Backend,
+        job: Callable[[], T],
+        bound: BoundLimiter,
+        cost: int,
+        counter: FunctionStats,
+        rate_limiter: RateLimiter | None,
+        timeout: float | None,
+        queue_timeout: float | None,
+        cancel_token: CancelToken | None = None,
+    ) -> T:
+        """
+        與 `_run` 相同，但分別限制等待與執行的時間。
+
+        limiter 一律由此處自行取得 (包含預設 limiter)，執行緒以 abandon_on_cancel 執行：
+        逾時或被取消時呼叫端立即返回，但 limiter 的名額會保留到執行緒真正結束，
+        由執行緒透過 `from_thread` 在 Event Loop 上釋放，因此 limiter 的用量反映
+        實際占用的執行緒數。指定 cancel_token 時，執行緒被放棄的同時會取消該 token，
+        讓同步函式提早結束。
+
+        Raises:
+            CircuitOpen: limiter 的斷路器已開啟。
+            QueueTimeout: 未在期限內取得 limiter。
+            ExecutionTimeout: 未在期限內執行完畢。
+        """
+        limiter, stats, pool, shedder, circuit = bound
+        _check_cost(limiter, cost)
+        if limiter is None:
+            limiter = _DEFAULT_LIMITERS[backend]()
+        if circuit is not None:
+            circuit.admit()
+        call_deadline = _deadline.get()
+        start = anyio.current_time()
+
+        borrower = object()
+        if stats is not None:
+            stats.waiting += 1
+        try:
+            with anyio.CancelScope(
+                deadline=_earliest(call_deadline, _after(start, queue_timeout))
+            ) as scope:
+                if rate_limiter is not None:
+                    await rate_limiter.acquire()
+                if shedder is not None:
+                    await shedder.acquire(limiter, borrower, cost)
+                elif cost == 1:
+                    await limiter.acquire_on_behalf_of(borrower)
+                else:
+                    await limiter.acquire_on_behalf_of(borrower, cost)
+        except BaseException:
+            if circuit is not None:
+                circuit.breaker.forget()
+            raise
+        finally:
+            if stats is not None:
+                stats.waiting -= 1
+        if scope.cancelled_caught:
+            if circuit is not None:
+                circuit.breaker.forget()
+            counter.queue_timeouts += 1
+            raise QueueTimeout(
+                f"等待 {anyio.current_time() - start:.3f} 秒後仍未取得 limiter"
+            )
+
+        acquired = anyio.current_time()
+        run_deadline = _earliest(call_deadline, _after(acquired, timeout))
+        if stats is not None:
+            stats.wait_time.observe(acquired - start)
+            stats.in_flight += 1
+
+        def finish() -> None:
+            limiter.release_on_behalf_of(borrower)
+            if stats is not None:
+                stats.in_flight -= 1
+                stats.run_time.observe(anyio.current_time() - acquired)
+
+        try:
+            if backend == "interpreter":
+                # 子直譯器無法中斷或放棄，期限只涵蓋等待
+                try:
+                    result = await anyio.to_interpreter.run_sync(job, limiter = self._passthrough)
+                finally:
+                    finish()
+
+            elif backend == "process":
+                # 逾時或取消時終止 worker 行程，名額可立即釋放
+                try:
+                    with anyio.CancelScope(deadline=run_deadline) as scope:
+                        result = await anyio.to_process.run_sync(
+                            job, cancellable = True, limiter = self._passthrough
+                        )
+                finally:
+                    finish()
+                if scope.cancelled_caught:
+                    counter.timeouts += 1
+                    raise ExecutionTimeout(
+                        f"執行 {anyio.current_time() - acquired:.3f} 秒後仍未完成，已終止 worker 行程"
+                    )
+
+            else:
+                if cancel_token is not None:
+                    job = partial(_call_with_token, cancel_token, job)
+                slot = _Slot(finish, partial(_forget, counter, stats), anyio.lowlevel.current_token())
+                try:
+                    with anyio.CancelScope(deadline=run_deadline) as scope:
+                        if pool is not None:
+                            result = await pool.run_sync(slot.run, job, abandon_on_cancel = True)
+                        else:
+                            result = await anyio.to_thread.run_sync(
+                                slot.run, job, abandon_on_cancel = True, limiter = self._passthrough
+                            )
+                finally:
+                    if slot.leave():
+                        if cancel_token is not None:
+                            cancel_token.cancel()
+                        counter.abandoned += 1
+                        if stats is not None:
+                            stats.abandoned += 1
+                if scope.cancelled_caught:
+                    counter.timeouts += 1
+                    raise ExecutionTimeout(
+                        f"執行 {anyio.current_time() - acquired:.3f} 秒後仍未完成，執行緒已被放棄"
+                    )
+        except BaseException as exc:
+            if circuit is not None:
+                circuit.breaker.record(anyio.current_time() - acquired, exc)
+            raise
+        if circuit is not None:
+            circuit.breaker.record(anyio.current_time() - acquired)
+        return result
+
+    def _bind_limiter(
+        self,
+        limiter: str | AnyLimiter | None,
+        backend: Backend,
+    ) -> Callable[[], BoundLimiter]:
+        """
+        將 limiter 參數綁定為一個取得實際 limiter 的函式，避免每次呼叫都重新解析。
+
+        非字串的 limiter 在裝飾時即解析完成；具名 limiter 在第一次呼叫時解析，
+        之後只在註冊表版本 (`_version`) 變動時才重新查詢，因此仍支援熱抽換。
+
+        Returns:
+            Callable[[], BoundLimiter]: 回傳目前應使用的 limiter 與其統計資料。
+        """
+        if not isinstance(limiter, str):
+            resolved = self._resolve_limiter(limiter, backend)
+            return lambda: resolved
+        return self._bind(partial(self._resolve_limiter, limiter, backend))
+
+    def _bind_rate_limiter(
+        self,
+        limiter: str | RateLimiter | None,
+    ) -> Callable[[], RateLimiter | None]:
+        """
+        與 `_bind_limiter` 相同，但用於 RateLimiter。
+
+        Raises:
+            RuntimeError: 指定名稱的 RateLimiter 尚未註冊 (呼叫時才拋出)。
+        """
+        if not isinstance(limiter, str):
+            return lambda: limiter
+
+        def resolve() -> RateLimiter:
+            actual_limiter = self.get_rate_limiter(limiter)
+            if actual_limiter is None:
+                raise RuntimeError(
+                    f"RateLimiter {limiter} 尚未註冊！"
+                )
+            return actual_limiter
+
+        return self._bind(resolve)
+
+    def _bind[B](self, resolve: Callable[[], B]) -> Callable[[], B]:
+        """
+        快取 resolve 的結果，只在註冊表版本 (`_version`) 變動時重新解析。
+        """
+        bound: B | None = None
+        bound_version = -1
+
+        def current() -> B:
+            nonlocal bound, bound_version
+            if bound_version != self._version:
+                bound = resolve()
+                bound_version = self._version
+            return bound
+
+        return current
+
+    @contextmanager
+    def _hold_key(self, name: str, backend: Backend):
+        """
+        解析 key 函式回傳的 limiter 名稱：先查具名 limiter，
+        再依前綴向 KeyedLimiter 取得 (或建立) 對應的 limiter，並在 context 內
+        保留它不被 KeyedLimiter 移除。
+
+        Yields:
+            BoundLimiter: 名稱對應的 limiter 與其統計資料。
+
+        Raises:
+            RuntimeError: 名稱沒有對應的具名 limiter 或 KeyedLimiter。
+        """
+        actual_limiter = self._limiter.get(name)
+        if actual_limiter is not None:
+            yield (
+                actual_limiter,
+                self._stats[name],
+                self._pool_for(name, backend),
+                self._shedders.get(name),
+                self._breakers.get(name),
+            )
+            return
+        for prefix, keyed in self._keyed_limiter.items():
+            if name.startswith(prefix):
+                stats = self._stats[prefix]
+                with keyed.hold(name) as keyed_limiter:
+                    yield keyed_limiter, stats, None, None, None
+                return
+        raise RuntimeError(
+            f"Limiter {name} 尚未註冊！"
+        )
+
+    def _pool_for(self, name: str, backend: Backend) -> WorkerPool | None:
+        """
+        取得具名 limiter 的專屬執行緒池；只有 "thread" 後端會使用。
+        """
+        return self._pools.get(name) if backend == "thread" else None
+
+    def _resolve_limiter(
+        self,
+        limiter: str | AnyLimiter | None,
+        backend: Backend,
+    ) -> BoundLimiter:
+        """
+        將 `to_async` 的 limiter 參數轉換為實際使用的 CapacityLimiter，
+        具名 limiter 會一併回傳其統計資料。
+
+        Raises:
+            RuntimeError: 指定名稱的 limiter 尚未註冊。
+            TypeError: limiter 不是支援的型別 (例如在 `to_async_batch` 使用 key 函式)。
+        """
+        match limiter:
+            case str():
+                actual_limiter = self.get_limiter(limiter)
+                if actual_limiter is None:
+                    raise RuntimeError(
+                        f"Limiter {limiter} 尚未註冊！"
+                    )
+                return (
+                    actual_limiter,
+                    self._stats[limiter],
+                    self._pool_for(limiter, backend),
+                    self._shedders.get(limiter),
+                    self._breakers.get(limiter),
+                )
+            case anyio.CapacityLimiter():
+                return limiter, None, None, None, None
+            case BaseLimiter():
+                # 自訂 limiter 無法交給 anyio 的 run_sync，必須由 AsyncManager 自行取得
+                return limiter, LimiterStats(limiter), None, None, None
+            case None:
+                return (self._default_limiter if backend == "thread" else None), None, None, None, None
+            case _:
+                raise TypeError(f"不支援的 limiter：{limiter!r}")
+
+
+class _Shedder:
+    """
+    具名 limiter 的有界等待佇列 (load shedding)。
+
+    只有取不到 token、必須等待的呼叫才會排入佇列；佇列已滿時依 policy
+    拒絕新的呼叫，或取消等待最久的呼叫，被捨棄的呼叫拋出 `LimiterOverloaded`。
+    """
+    __slots__ = ("name", "max_waiting", "policy", "stats", "waiters")
+
+    def __init__(self, name: str, max_waiting: int, policy: ShedPolicy, stats: LimiterStats):
+        self.name = name
+        self.max_waiting = max_waiting
+        self.policy = policy
+        self.stats = stats
+        # borrower -> 等待中的 CancelScope，依排入順序排列
+        self.waiters: OrderedDict[object, anyio.CancelScope] = OrderedDict()
+
+    async def acquire(self, limiter: AnyLimiter, borrower: object, cost: int) -> None:
+        """
+        Raises:
+            LimiterOverloaded: 佇列已滿而被拒絕，或在等待中被擠出。
+        """
+        if not self.waiters and limiter.available_tokens >= cost:
+            # 不需要等待，不占用佇列
+            if cost == 1:
+                await limiter.acquire_on_behalf_of(borrower)
+            else:
+                await limiter.acquire_on_behalf_of(borrower, cost)
+            return
+
+        if len(self.waiters) >= self.max_waiting:
+            if self.policy == "reject" or not self.waiters:
+                self.stats.shed += 1
+                raise LimiterOverloaded(self.name)
+            _, oldest = self.waiters.popitem(last=False)
+            oldest.cancel()
+
+        with anyio.CancelScope() as scope:
+            self.waiters[borrower] = scope
+            try:
+                if cost == 1:
+                    await limiter.acquire_on_behalf_of(borrower)
+                else:
+                    await limiter.acquire_on_behalf_of(borrower, cost)
+            finally:
+                self.waiters.pop(borrower, None)
+        if scope.cancelled_caught:
+            self.stats.shed += 1
+            raise LimiterOverloaded(self.name)
+
+
+class _Circuit:
+    """
+    綁定到具名 limiter 的斷路器，斷路器開啟時在 Event Loop 上拒絕呼叫。
+    """
+    __slots__ = ("name", "breaker", "stats")
+
+    def __init__(self, name: str, breaker: CircuitBreaker, stats: LimiterStats):
+        self.name = name
+        self.breaker = breaker
+        self.stats = stats
+
+    def admit(self) -> None:
+        """
+        Raises:
+            CircuitOpen: 斷路器已開啟。
+        """
+        if not self.breaker.allow():
+            self.stats.short_circuited += 1
+            raise CircuitOpen(self.name)
+
+
+class _Slot:
+    """
+    `_run_bounded` 中一個執行緒工作占用的 limiter 名額。
+
+    呼叫端與執行緒以鎖交接名額的釋放責任：執行緒尚未開始時由呼叫端釋放並
+    跳過工作；執行中被放棄時，由執行緒結束後在 Event Loop 上釋放。
+    """
+    __slots__ = ("release", "forget", "token", "lock", "state")
+
+    PENDING, RUNNING, ABANDONED, DONE = range(4)
+
+    def __init__(self, release: Callable[[], None], forget: Callable[[], None], token: object):
+        """
+        Args:
+            release: 釋放名額並更新統計的函式 (在 Event Loop 上呼叫)。
+            forget: 被放棄的執行緒結束後，更新放棄中執行緒數的函式。
+            token: Event Loop 的 token，供執行緒回到 Event Loop 釋放名額。
+        """
+        self.release = release
+        self.forget = forget
+        self.token = token
+        self.lock = threading.Lock()
+        self.state = _Slot.PENDING
+
+    def run[T](self, job: Callable[[], T]) -> T | None:
+        """
+        在 worker thread 中執行 job。
+        """
+        with self.lock:
+            if self.state != _Slot.PENDING:
+                # 呼叫端已在開始前離開，名額已由呼叫端釋放
+                return None
+            self.state = _Slot.RUNNING
+        try:
+            return job()
+        finally:
+            with self.lock:
+                abandoned = self.state == _Slot.ABANDONED
+                self.state = _Slot.DONE
+            if abandoned:
+                try:
+                    anyio.from_thread.run_sync(self._exit, token = self.token)
+                except anyio.RunFinishedError:
+                    pass
+
+    def leave(self) -> bool:
+        """
+        呼叫端離開時呼叫 (在 Event Loop 上)。
+
+        Returns:
+            bool: 執行緒仍在執行而被放棄時為 True，此時由執行緒負責釋放名額。
+        """
+        with self.lock:
+            if self.state == _Slot.RUNNING:
+                self.state = _Slot.ABANDONED
+                return True
+            self.state = _Slot.DONE
+        self.release()
+        return False
+
+    def _exit(self) -> None:
+        self.release()
+        self.forget()
+
+
+def _forget(counter: FunctionStats, stats: LimiterStats | None) -> None:
+    """
+    被放棄的執行緒結束後，更新放棄中的執行緒數。
+    """
+    counter.abandoned -= 1
+    if stats is not None:
+        stats.abandoned -= 1
+
+
+def _check_cost(limiter: AnyLimiter | None, cost: int) -> None:
+    """
+    Raises:
+        TypeError: 指定了 cost，但 limiter 不支援權重。
+    """
+    if cost != 1 and not isinstance(limiter, BaseLimiter):
+        raise TypeError(
+            f"{type(limiter).__name__} 不支援 cost，請改用 WeightedLimiter 等自訂 limiter"
+        )
+
+
+def _after(start: float, seconds: float | None) -> float | None:
+    """
+    將相對秒數轉為絕對期限；未設定時為 None。
+    """
+    return None if seconds is None else start + seconds
+
+
+def _earliest(*deadlines: float | None) -> float:
+    """
+    取最早的期限；皆未設定時為無限期。
+    """
+    return min((d for d in deadlines if d is not None), default=math.inf)
+
+
+class _Flight:
+    """
+    `to_async(coalesce=True)` 中一個執行中的呼叫，供相同參數的等待者共用結果。
+    """
+    __slots__ = ("result", "error", "abandoned", "done")
+
+    def __init__(self):
+        self.result = None
+        self.error: Exception | None = None
+        self.abandoned = False
+        self.done = anyio.Event()
+
+
+def _produce(
+    generate: Callable[[], Iterable],
+    send: anyio.abc.ObjectSendStream,
+    batch_size: int,
+    finish: Callable[[], None],
+    token: anyio.lowlevel.EventLoopToken,
+) -> None:
+    """
+    在 worker thread 中執行 generator，每 batch_size 筆送回 Event Loop；
+    結束時 (包含例外與消費端提早關閉) 在 Event Loop 上呼叫 finish。
+    """
+    try:
+        items = iter(generate())
+        try:
+            batch = []
+            for item in items:
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    anyio.from_thread.run(send.send, batch, token = token)
+                    batch = []
+            if batch:
+                anyio.from_thread.run(send.send, batch, token = token)
+        finally:
+            close = getattr(items, "close", None)
+            if close is not None:
+                close()
+    except (anyio.BrokenResourceError, anyio.ClosedResourceError, anyio.RunFinishedError, OperationCancelled):
+        # 消費端已停止迭代，或 Event Loop 已結束
+        pass
+    except BaseException as exc:
+        try:
+            anyio.from_thread.run(send.send, exc, token = token)
+        except (anyio.BrokenResourceError, anyio.ClosedResourceError, anyio.RunFinishedError):
+            pass
+    finally:
+        try:
+            anyio.from_thread.run_sync(finish, token = token)
+        except anyio.RunFinishedError:
+            pass
+
+
+class _Pending:
+    """
+    `map` 中一個元素的結果。
+    """
+    __slots__ = ("result", "error", "done")
+
+    def __init__(self):
+        self.result = None
+        self.error: BaseException | None = None
+        self.done = anyio.Event()
+
+
+class _Batch:
+    """
+    `to_async_batch` 收集中的一個批次。
+    """
+    __slots__ = ("items", "results", "error", "full", "done")
+
+    def __init__(self):
+        self.items: list = []
+        self.results: list | None = None
+        self.error: BaseException | None = None
+        self.full = anyio.Event()
+        self.done = anyio.Event()
+
+
+def _is_key_function(limiter: object) -> bool:
+    """
+    判斷 `to_async` 的 limiter 參數是否為 key 函式 (而非 limiter 物件或名稱)。
+    """
+    return callable(limiter) and not isinstance(
+        limiter, (str, anyio.CapacityLimiter, BaseLimiter)
+    )
+
+
+def _make_key(args: tuple, kwargs: dict) -> Hashable | None:
+    """
+    由呼叫參數建立可 hash 的 key。
+
+    Returns:
+        Hashable | None: 參數皆可 hash 時回傳 key，否則回傳 None。
+    """
+    # 以 sentinel 分隔位置參數與關鍵字參數，避免 f(1, b=2) 與 f((1,), (("b", 2),)) 產生相同的 key
+    key = args + (_KWD_MARK,) + tuple(sorted(kwargs.items())) if kwargs else args
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def _worker_call(f: Callable) -> Callable:
+    """
+    建立可傳送到 worker 行程 / 子直譯器的函式參照。
+
+    pickle 以「模組 + qualname」序列化函式，但裝飾後該名稱通常指向 wrapper，
+    因此改為傳送名稱，在 worker 端由 `_call_by_name` 重新找回原始函式。
+
+    Args:
+        f: 被裝飾的原始同步函式。
+
+    Returns:
+        Callable: 可被 pickle 的 `_call_by_name` partial。
+
+    Raises:
+        ValueError: 函式不是定義在模組層級（例如 lambda 或巢狀函式）。
+    """
+    if "<" in f.__qualname__:
+        raise ValueError(
+            f"{f.__qualname__} 無法在 worker 中以名稱找回，請將函式定義在模組層級"
+        )
+    return partial(_call_by_name, f.__module__, f.__qualname__)
+
+
+def _call_by_name(module: str, qualname: str, /, *args, **kwargs):
+    """
+    在 worker 端依名稱找回原始同步函式並呼叫。
+
+    若名稱指向 `to_async` 產生的 wrapper，則經由 `__wrapped__` 取得原始函式。
+    """
+    target = importlib.import_module(module)
+    for attr in qualname.split("."):
+        target = getattr(target, attr)
+    if inspect.iscoroutinefunction(target):
+        target = target.__wrapped__
+    return target(*args, **kwargs)
+
 
 if __name__ == "__main__":
     import asyncio
@@ -0,0 +1,155 @@
+"""
+此模組提供 AsyncManager 的統計資料結構。
+
+所有計數都只在 Event Loop 上更新，因此不需要任何鎖；Histogram 使用固定的
+bucket 上界，每次記錄只需一次二分搜尋與兩次加法。
+"""
+import math
+from bisect import bisect_left
+
+from .cache import TTLCache
+from .limiters import AnyLimiter
+
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, math.inf,
+)
+"""預設的 Histogram bucket 上界 (秒)。"""
+
+
+class Histogram:
+    """
+    固定 bucket 的低成本 Histogram。
+
+    Attributes:
+        buckets: 各 bucket 的上界 (遞增，最後一個為 `math.inf`)。
+        counts: 各 bucket 的觀測次數 (非累積)。
+        count: 總觀測次數。
+        sum: 觀測值總和。
+    """
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        Args:
+            buckets: bucket 上界，必須遞增；若最後一個不是 `math.inf` 會自動補上。
+        """
+        if not buckets or buckets[-1] != math.inf:
+            buckets = (*buckets, math.inf)
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """
+        記錄一個觀測值。
+
+        Args:
+            value: 觀測值 (秒)。
+        """
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    @property
+    def mean(self) -> float:
+        """
+        觀測值的平均；尚無資料時為 0。
+        """
+        return self.sum / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """
+        估計第 q 分位數，回傳該分位數所在 bucket 的上界。
+
+        Args:
+            q: 介於 0 與 1 之間的分位數，例如 0.99。
+
+        Returns:
+            float: 估計值；尚無資料時為 0。
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.buckets[-1]
+
+
+class LimiterStats:
+    """
+    單一具名 limiter 的統計資料。
+
+    Attributes:
+        waiting: 目前正在等待取得 limiter 的呼叫數。
+        in_flight: 目前已取得 limiter、正在執行的呼叫數 (包含已放棄但仍在執行的執行緒)。
+        abandoned: 因逾時或取消而被放棄、但仍在背景執行並占用 limiter 的執行緒數。
+        shed: 累計因等待佇列已滿 (`max_waiting`) 而被拒絕或擠出的呼叫數。
+        short_circuited: 累計因斷路器開啟而被直接拒絕的呼叫數。
+        wait_time: 等待取得 limiter 所花時間的 Histogram。
+        run_time: 取得 limiter 後實際執行所花時間的 Histogram。
+    """
+    __slots__ = ("limiter", "waiting", "in_flight", "abandoned", "shed", "short_circuited", "wait_time", "run_time")
+
+    def __init__(self, limiter: AnyLimiter):
+        """
+        Args:
+            limiter: 被統計的 limiter，用於回報目前的容量。
+        """
+        self.limiter = limiter
+        self.waiting = 0
+        self.in_flight = 0
+        self.abandoned = 0
+        self.shed = 0
+        self.short_circuited = 0
+        self.wait_time = Histogram()
+        self.run_time = Histogram()
+
+    @property
+    def capacity(self) -> float:
+        """
+        limiter 目前的容量 (`total_tokens`)。
+        """
+        return self.limiter.total_tokens
+
+    def __repr__(self) -> str:
+        return (
+            f"LimiterStats(capacity={self.capacity}, in_flight={self.in_flight}, "
+            f"waiting={self.waiting}, abandoned={self.abandoned}, shed={self.shed}, short_circuited={self.short_circuited}, wait_p99={self.wait_time.quantile(0.99)}, "
+            f"run_p99={self.run_time.quantile(0.99)})"
+        )
+
+
+class FunctionStats:
+    """
+    單一被裝飾函式的統計資料。
+
+    Attributes:
+        calls: 累計呼叫次數 (包含快取命中)。
+        cache: 該函式使用的結果快取；未使用快取時為 None。
+        queue_timeouts: 累計在等待期間逾時 (`QueueTimeout`) 的呼叫數。
+        timeouts: 累計在執行期間逾時 (`ExecutionTimeout`) 的呼叫數。
+        abandoned: 因逾時或取消而被放棄、但仍在背景執行的執行緒數。
+    """
+    __slots__ = ("calls", "cache", "queue_timeouts", "timeouts", "abandoned", "__weakref__")
+
+    def __init__(self, cache: TTLCache | None = None):
+        """
+        Args:
+            cache: 該函式使用的結果快取。
+        """
+        self.calls = 0
+        self.cache = cache
+        self.queue_timeouts = 0
+        self.timeouts = 0
+        self.abandoned = 0
+
+    def __repr__(self) -> str:
+        return (
+            f"FunctionStats(calls={self.calls}, cache={self.cache and self.cache.info()}, "
+            f"queue_timeouts={self.queue_timeouts}, timeouts={self.timeouts}, abandoned={self.abandoned})"
+        )
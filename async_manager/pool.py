@@ -0,0 +1,338 @@
+"""
+此模組提供可綁定到具名 limiter 的專屬執行緒池 (Bulkhead)。
+
+預設情況下所有 `to_async` 呼叫共用 anyio 的 worker thread；將 `WorkerPool`
+綁定到具名 limiter 後，該 limiter 的呼叫只會在自己的執行緒中執行，
+不同工作負載 (例如資料庫、檔案系統、CPU) 的執行緒彼此隔離。
+"""
+import contextvars
+import itertools
+import threading
+from collections import deque
+from functools import partial
+from typing import Awaitable, Callable
+
+import anyio
+import anyio.from_thread
+import anyio.lowlevel
+
+from .threadlocal import _close_thread_locals
+
+_event_loop_token: contextvars.ContextVar[anyio.lowlevel.EventLoopToken | None] = contextvars.ContextVar(
+    "async_manager_event_loop_token", default=None
+)
+
+
+def current_event_loop_token() -> anyio.lowlevel.EventLoopToken | None:
+    """
+    取得送出目前工作的 Event Loop 的 token；不在 `WorkerPool` 的工作中時為 None。
+
+    池中的執行緒不是 anyio 的 worker thread，回到 Event Loop 時需明確傳入 token。
+    anyio 的 `from_thread` 在 token 為 None 時改用 worker thread 自己的 Event Loop，
+    因此同一段程式碼在 `WorkerPool` 與 anyio 的預設執行緒池中都能使用。
+
+    Example:
+        >>> @to_async(limiter="db")
+        >>> def query(sql: str):
+        >>>     anyio.from_thread.run(notify, sql, token=current_event_loop_token())
+    """
+    return _event_loop_token.get()
+
+
+class _WorkItem:
+    """
+    送進 WorkerPool 的一個工作，完成後在 Event Loop 上設定 event。
+    """
+    __slots__ = ("context", "func", "args", "token", "event", "on_done", "result", "error")
+
+    def __init__(self, func: Callable, args: tuple, on_done: Callable[["_WorkItem"], object] | None = None):
+        self.context = contextvars.copy_context()
+        self.func = func
+        self.args = args
+        self.token = anyio.lowlevel.current_token()
+        self.event = anyio.Event()
+        self.on_done = on_done
+        self.result = None
+        self.error: BaseException | None = None
+
+
+class WorkerPool:
+    """
+    專屬的執行緒池，介面與 `anyio.to_thread.run_sync` 相同。
+
+    池中的執行緒不是 anyio 的 worker thread：工作中呼叫 `anyio.from_thread.run()` /
+    `anyio.from_thread.run_sync()` 時需傳入 `token=current_event_loop_token()`，
+    `anyio.from_thread.check_cancelled()` 也無法使用，需要協作式取消時請改用
+    `to_async(cancellable=True)` 與 `checkpoint()`。
+
+    執行緒在需要時才建立，最多 `max_threads` 個；閒置超過 `idle_timeout` 秒的
+    執行緒會結束，但至少保留 `min_threads` 個。並發數由綁定的 limiter 控制，
+    因此 `max_threads` 通常與 limiter 的容量相同。
+
+    Example:
+        >>> pool = WorkerPool(16, min_threads=4, thread_name_prefix="db")
+        >>> with manager.create_limiter("db", 16, pool=pool):
+        >>>     await query("SELECT 1")
+    """
+    def __init__(
+        self,
+        max_threads: int,
+        *,
+        min_threads: int = 0,
+        idle_timeout: float = 10.0,
+        thread_name_prefix: str = "async-manager-worker",
+        on_thread_start: Callable[[], object] | None = None,
+        on_thread_exit: Callable[[], object] | None = None,
+    ):
+        """
+        Args:
+            max_threads: 最多建立的執行緒數。
+            min_threads: 閒置時至少保留的執行緒數。
+            idle_timeout: 執行緒閒置多少秒後結束。
+            thread_name_prefix: 執行緒名稱的前綴，名稱為 `{prefix}-{n}`。
+            on_thread_start: 每個執行緒開始處理工作前，在該執行緒中呼叫一次
+                    (例如建立 thread-local 連線)。拋出例外時該執行緒會結束，
+                    佇列中的下一個工作會收到同一個例外，其餘工作交給新建立的執行緒。
+            on_thread_exit: 每個執行緒因閒置或 `close()` 結束前，在該執行緒中呼叫一次
+                    (例如關閉連線)。行程結束時仍存活的執行緒不會呼叫。
+
+        Raises:
+            ValueError: max_threads 小於 1，或 min_threads 不在 0 ~ max_threads 之間。
+        """
+        if max_threads < 1:
+            raise ValueError("max_threads 必須大於等於 1")
+        if not 0 <= min_threads <= max_threads:
+            raise ValueError("min_threads 必須介於 0 與 max_threads 之間")
+        self.max_threads = max_threads
+        self.min_threads = min_threads
+        self.idle_timeout = idle_timeout
+        self.thread_name_prefix = thread_name_prefix
+        self.on_thread_start = on_thread_start
+        self.on_thread_exit = on_thread_exit
+        self._items: deque[_WorkItem] = deque()
+        self._cond = threading.Condition(threading.Lock())
+        self._threads: set[threading.Thread] = set()
+        self._idle = 0
+        self._names = itertools.count(1)
+        self._closed = False
+
+    @property
+    def threads(self) -> int:
+        """
+        目前存在的執行緒數。
+        """
+        return len(self._threads)
+
+    @property
+    def idle_threads(self) -> int:
+        """
+        目前閒置 (等待工作) 的執行緒數。
+        """
+        return self._idle
+
+    async def warm_up(
+        self,
+        count: int | None = None,
+        initializer: Callable[[], object] | None = None,
+    ) -> None:
+        """
+        預先建立執行緒，讓第一批呼叫不必等待執行緒建立。
+
+        超過 `min_threads` 的執行緒仍會在閒置 `idle_timeout` 秒後結束。
+
+        Args:
+            count: 要確保存在的執行緒數，預設為 max_threads。
+            initializer: 在每個被預熱的執行緒中執行一次的函式
+                    (例如建立連線、載入模型)。
+        """
+        count = self.max_threads if count is None else min(count, self.max_threads)
+        await _prestart(self.run_sync, count, initializer)
+
+    async def run_sync[T](
+        self,
+        func: Callable[..., T],
+        *args,
+        abandon_on_cancel: bool = False,
+        limiter: anyio.CapacityLimiter | None = None,
+    ) -> T:
+        """
+        在池中的執行緒執行 func，語意與 `anyio.to_thread.run_sync` 相同
+        (`anyio.from_thread` 的差異見類別說明)。
+
+        Args:
+            func: 要執行的同步函式。
+            *args: 傳給 func 的位置參數。
+            abandon_on_cancel: 被取消時是否立即返回 (放棄執行中的執行緒)；
+                    否則會等到 func 執行完畢。尚未開始的工作被取消時會被跳過。
+            limiter: 執行期間要持有的 limiter；None 表示不額外限制。
+
+        Returns:
+            T: func 的回傳值。
+        """
+        if limiter is None:
+            return await self._submit(func, args, abandon_on_cancel)
+        async with limiter:
+            return await self._submit(func, args, abandon_on_cancel)
+
+    def close(self) -> None:
+        """
+        停止保留閒置執行緒：執行中的工作照常完成，之後執行緒陸續結束。
+        關閉後仍可送出工作，但每個執行緒做完手上的工作就會結束。
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    async def _submit(self, func: Callable, args: tuple, abandon_on_cancel: bool):
+        await anyio.lowlevel.checkpoint()
+        item = self._enqueue(func, args)
+        try:
+            with anyio.CancelScope(shield=not abandon_on_cancel):
+                await item.event.wait()
+        except BaseException:
+            with self._cond:
+                # 尚未開始的工作直接移除；已開始的工作由執行緒跑完後丟棄結果
+                if item in self._items:
+                    self._items.remove(item)
+            raise
+
+        if item.error is not None:
+            raise item.error
+        return item.result
+
+    def _enqueue(
+        self,
+        func: Callable,
+        args: tuple,
+        on_done: Callable[[_WorkItem], object] | None = None,
+    ) -> _WorkItem:
+        """
+        將工作排入佇列但不等待完成，必須在 Event Loop 上呼叫。
+        on_done 在工作完成 (包含 on_thread_start 失敗而沒有執行) 後於 Event Loop 上呼叫。
+        """
+        item = _WorkItem(func, args, on_done)
+        with self._cond:
+            self._items.append(item)
+            if len(self._items) > self._idle and len(self._threads) < self.max_threads:
+                self._spawn()
+            self._cond.notify()
+        return item
+
+    def _spawn(self) -> threading.Thread:
+        # 需持有 self._cond
+        thread = threading.Thread(
+            target=self._work,
+            name=f"{self.thread_name_prefix}-{next(self._names)}",
+            daemon=True,
+        )
+        self._threads.add(thread)
+        thread.start()
+        return thread
+
+    def _work(self) -> None:
+        current = threading.current_thread()
+        if self.on_thread_start is not None:
+            try:
+                self.on_thread_start()
+            except BaseException as exc:
+                with self._cond:
+                    self._threads.discard(current)
+                    failed = [self._items.popleft()] if self._items else []
+                    # 其餘工作交給替補執行緒 (它會再次呼叫 on_thread_start)；
+                    # 無法建立替補執行緒時一併失敗，避免呼叫端永遠等待
+                    if len(self._items) > self._idle:
+                        if len(self._threads) < self.max_threads:
+                            self._spawn()
+                        else:
+                            failed.extend(self._items)
+                            self._items.clear()
+                for item in failed:
+                    item.error = exc
+                    _report(item)
+                return
+        try:
+            self._serve(current)
+        finally:
+            try:
+                if self.on_thread_exit is not None:
+                    self.on_thread_exit()
+            finally:
+                _close_thread_locals()
+
+    def _serve(self, current: threading.Thread) -> None:
+        while True:
+            with self._cond:
+                self._idle += 1
+                while not self._items:
+                    timed_out = not self._cond.wait(0 if self._closed else self.idle_timeout)
+                    if self._items:
+                        break
+                    if self._closed or (timed_out and len(self._threads) > self.min_threads):
+                        self._idle -= 1
+                        self._threads.discard(current)
+                        return
+                self._idle -= 1
+                item = self._items.popleft()
+
+            try:
+                item.result = item.context.run(_run_item, item)
+            except BaseException as exc:
+                item.error = exc
+            _report(item)
+            del item
+
+
+def _run_item(item: _WorkItem):
+    """
+    在工作自己的 context 中執行，並記錄送出工作的 Event Loop 的 token。
+    """
+    _event_loop_token.set(item.token)
+    return item.func(*item.args)
+
+
+def _report(item: _WorkItem) -> None:
+    """
+    在 Event Loop 上通知等待中的呼叫端工作已完成。
+    """
+    try:
+        anyio.from_thread.run_sync(_complete, item, token = item.token)
+    except anyio.RunFinishedError:
+        pass
+
+
+def _complete(item: _WorkItem) -> None:
+    item.event.set()
+    if item.on_done is not None:
+        item.on_done(item)
+
+
+async def _prestart(
+    run_sync: Callable[..., Awaitable],
+    count: int,
+    initializer: Callable[[], object] | None = None,
+    limiter: anyio.CapacityLimiter | None = None,
+    timeout: float = 10.0,
+) -> None:
+    """
+    同時送出 count 個互相等待的工作，迫使執行緒池建立 count 個不同的執行緒，
+    並在每個執行緒中執行 initializer。
+    """
+    if count < 1:
+        return
+    barrier = threading.Barrier(count)
+
+    def occupy() -> None:
+        if initializer is not None:
+            initializer()
+        try:
+            barrier.wait(timeout)
+        except threading.BrokenBarrierError:
+            # 執行緒數不足以同時容納 count 個工作時，放棄等待
+            pass
+
+    async with anyio.create_task_group() as tg:
+        for _ in range(count):
+            if limiter is None:
+                tg.start_soon(run_sync, occupy)
+            else:
+                tg.start_soon(partial(run_sync, occupy, limiter = limiter))
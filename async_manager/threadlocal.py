@@ -0,0 +1,94 @@
+"""
+此模組提供具型別的 thread-local 資源存取。
+
+worker thread 會被重複使用，適合存放建立成本高、又不能跨執行緒共用的資源
+(例如資料庫連線、parser 實例)：每個執行緒只建立一次，而不是每次呼叫都建立。
+"""
+import threading
+import weakref
+from typing import Callable
+
+
+_finalizers = threading.local()
+
+
+def _close_thread_locals() -> None:
+    """
+    關閉目前執行緒中所有 ThreadLocal 的資源；由 `WorkerPool` 在執行緒結束前呼叫。
+    """
+    for finalizer in _finalizers.__dict__.pop("items", ()):
+        finalizer()
+
+
+class _Holder:
+    """
+    只存放在 thread-local 中的物件；執行緒結束時被回收，藉此觸發資源的關閉。
+    """
+    __slots__ = ("__weakref__",)
+
+
+class ThreadLocal[T]:
+    """
+    每個執行緒各自一份、第一次使用時才建立的資源。
+
+    指定 close 時，資源會在所屬執行緒結束 (或呼叫 `reset()`) 時關閉。
+    `WorkerPool` 的執行緒會在結束前 (`on_thread_exit` 之後) 明確關閉資源；
+    其他執行緒 (例如 anyio 的 worker thread) 則在執行緒的清理階段關閉，
+    此時 close 不應依賴 `threading.current_thread()` 等執行緒狀態。
+
+    Example:
+        >>> connection = ThreadLocal(lambda: sqlite3.connect("app.db"), close=lambda c: c.close())
+        >>> @to_async(limiter="db")
+        >>> def query(sql: str):
+        >>>     return connection.get().execute(sql).fetchall()
+    """
+    def __init__(
+        self,
+        factory: Callable[[], T],
+        *,
+        close: Callable[[T], object] | None = None,
+    ):
+        """
+        Args:
+            factory: 建立資源的函式，每個執行緒呼叫一次。
+            close: 關閉資源的函式，在所屬執行緒結束時呼叫；行程結束時仍存活的執行緒不會呼叫。
+        """
+        self._factory = factory
+        self._close = close
+        self._local = threading.local()
+
+    def get(self) -> T:
+        """
+        取得目前執行緒的資源，不存在時建立。
+
+        Returns:
+            T: 目前執行緒的資源。
+        """
+        try:
+            return self._local.value
+        except AttributeError:
+            pass
+        value = self._factory()
+        self._local.value = value
+        if self._close is not None:
+            holder = self._local.holder = _Holder()
+            finalizer = weakref.finalize(holder, self._close, value)
+            finalizer.atexit = False
+            _finalizers.__dict__.setdefault("items", []).append(finalizer)
+        return value
+
+    def reset(self) -> None:
+        """
+        丟棄 (並關閉) 目前執行緒的資源，下次 `get()` 時重新建立。
+        例如連線失效時使用。
+        """
+        self._local.__dict__.pop("value", None)
+        # 移除 holder 會立即觸發 close
+        self._local.__dict__.pop("holder", None)
+
+    @property
+    def initialized(self) -> bool:
+        """
+        目前執行緒是否已建立資源。
+        """
+        return hasattr(self._local, "value")
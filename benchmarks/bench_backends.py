@@ -0,0 +1,49 @@
+"""
+比較 `to_async` 各執行後端 (thread / interpreter / process) 在 CPU 密集型工作下的吞吐量。
+
+請在已安裝本專案 (例如 `uv sync`) 的環境中，從專案根目錄執行:
+    python benchmarks/bench_backends.py --jobs 32 --size 200000 --workers 4
+"""
+import argparse
+import time
+
+import anyio
+
+from benchmarks.workloads import (
+    crunch_interpreter,
+    crunch_process,
+    crunch_thread,
+    manager,
+)
+
+
+async def _measure(func, jobs: int, size: int, workers: int) -> float:
+    # 先讓每個 worker 都啟動一次，排除啟動成本
+    async with anyio.create_task_group() as tg:
+        for _ in range(workers):
+            tg.start_soon(func, 1)
+    start = time.perf_counter()
+    async with anyio.create_task_group() as tg:
+        for _ in range(jobs):
+            tg.start_soon(func, size)
+    return time.perf_counter() - start
+
+
+async def main(jobs: int, size: int, workers: int) -> None:
+    with manager.create_limiter("bench", workers):
+        for name, func in (
+            ("thread", crunch_thread),
+            ("interpreter", crunch_interpreter),
+            ("process", crunch_process),
+        ):
+            elapsed = await _measure(func, jobs, size, workers)
+            print(f"{name:<12} {elapsed:8.3f}s  {jobs / elapsed:8.1f} jobs/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--jobs", type=int, default=32)
+    parser.add_argument("--size", type=int, default=200_000)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+    anyio.run(main, args.jobs, args.size, args.workers)
@@ -0,0 +1,181 @@
+"""
+量測 `to_async` 的分派成本 (per-call overhead) 與吞吐量。
+
+比較以下方式在不同 payload 大小與並發數下的表現：
+- `anyio.to_thread.run_sync` (原生)
+- `asyncio.to_thread` (原生)
+- `to_async` 不指定 limiter
+- `to_async` 傳入 `CapacityLimiter` 物件
+- `to_async` 使用具名 limiter
+
+結果以 JSON 輸出，可用 `--compare` 與先前的結果比較，吞吐量下降超過
+`--tolerance` 時以非零狀態碼結束，方便在發版前檢查效能退化。
+
+請在已安裝本專案 (例如 `uv sync`) 的環境中，從專案根目錄執行:
+    python benchmarks/bench_dispatch.py --output bench_dispatch.json
+    python benchmarks/bench_dispatch.py --quick --compare bench_dispatch.json
+"""
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from importlib.metadata import version
+
+import anyio
+
+from async_manager import AsyncManager
+
+CAPACITY = 40
+"""limiter 容量，與 anyio 預設執行緒池上限相同，讓各方式的條件一致。"""
+
+manager = AsyncManager()
+object_limiter = anyio.CapacityLimiter(CAPACITY)
+
+
+def echo(payload: bytes) -> bytes:
+    return payload
+
+
+to_async_default = manager.to_async(echo)
+to_async_object = manager.to_async(echo, limiter=object_limiter)
+to_async_named = manager.to_async(echo, limiter="bench")
+
+
+async def anyio_run_sync(payload: bytes) -> bytes:
+    return await anyio.to_thread.run_sync(echo, payload)
+
+
+async def asyncio_to_thread(payload: bytes) -> bytes:
+    return await asyncio.to_thread(echo, payload)
+
+
+VARIANTS = {
+    "anyio.to_thread.run_sync": anyio_run_sync,
+    "asyncio.to_thread": asyncio_to_thread,
+    "to_async": to_async_default,
+    "to_async(limiter=CapacityLimiter)": to_async_object,
+    "to_async(limiter=name)": to_async_named,
+}
+
+
+async def _measure(func, payload: bytes, concurrency: int, calls: int) -> float:
+    per_worker, extra = divmod(calls, concurrency)
+
+    async def worker(count: int) -> None:
+        for _ in range(count):
+            await func(payload)
+
+    start = time.perf_counter()
+    async with anyio.create_task_group() as tg:
+        for i in range(concurrency):
+            tg.start_soon(worker, per_worker + (i < extra))
+    return time.perf_counter() - start
+
+
+async def run(payloads: list[int], concurrencies: list[int], calls: int, repeat: int) -> list[dict]:
+    results = []
+    with manager.create_limiter("bench", CAPACITY):
+        for size in payloads:
+            payload = b"x" * size
+            for concurrency in concurrencies:
+                total = max(calls, concurrency)
+                for name, func in VARIANTS.items():
+                    # 暖機，讓執行緒池先建立好 worker
+                    await _measure(func, payload, min(concurrency, CAPACITY), CAPACITY)
+                    best = min([
+                        await _measure(func, payload, concurrency, total)
+                        for _ in range(repeat)
+                    ])
+                    result = {
+                        "variant": name,
+                        "payload_bytes": size,
+                        "concurrency": concurrency,
+                        "calls": total,
+                        "seconds": best,
+                        "throughput": total / best,
+                        "per_call_us": best / total * 1e6,
+                    }
+                    results.append(result)
+                    print(
+                        f"{name:<36} payload={size:<8} concurrency={concurrency:<7} "
+                        f"{result['throughput']:>10.0f} calls/s {result['per_call_us']:>8.1f} us/call",
+                        file=sys.stderr,
+                    )
+    return results
+
+
+def compare(results: list[dict], baseline_path: str, tolerance: float) -> bool:
+    """
+    與先前的結果比較吞吐量，回傳是否全部在容許範圍內。
+    """
+    with open(baseline_path) as fp:
+        baseline = {
+            (r["variant"], r["payload_bytes"], r["concurrency"]): r["throughput"]
+            for r in json.load(fp)["results"]
+        }
+
+    ok = True
+    for r in results:
+        before = baseline.get((r["variant"], r["payload_bytes"], r["concurrency"]))
+        if before is None:
+            continue
+        ratio = r["throughput"] / before
+        if ratio < 1 - tolerance:
+            ok = False
+            print(
+                f"REGRESSION {r['variant']} payload={r['payload_bytes']} "
+                f"concurrency={r['concurrency']}: {ratio:.2f}x of baseline",
+                file=sys.stderr,
+            )
+    return ok
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--payload", type=int, nargs="+", default=[0, 1024, 1024 * 1024],
+                        help="payload 大小 (bytes)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 100, 1_000, 10_000, 100_000],
+                        help="同時進行的呼叫數")
+    parser.add_argument("--calls", type=int, default=10_000,
+                        help="每個組合的總呼叫數 (至少等於並發數)")
+    parser.add_argument("--repeat", type=int, default=3, help="重複次數，取最佳值")
+    parser.add_argument("--quick", action="store_true",
+                        help="只跑小規模組合 (payload 0 / 1024、並發 1 / 100 / 1000)")
+    parser.add_argument("--output", help="JSON 輸出路徑；未指定時輸出到 stdout")
+    parser.add_argument("--compare", help="與先前的 JSON 結果比較")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="可容許的吞吐量下降比例 (預設 0.2)")
+    args = parser.parse_args()
+
+    if args.quick:
+        args.payload, args.concurrency, args.calls = [0, 1024], [1, 100, 1_000], 2_000
+
+    results = asyncio.run(run(args.payload, args.concurrency, args.calls, args.repeat))
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version,
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "anyio": version("anyio"),
+        "async_manager": version("async_manager"),
+        "runtime": manager.runtime_info().threading_mode,
+        "results": results,
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as fp:
+            fp.write(text)
+    else:
+        print(text)
+
+    if args.compare and not compare(results, args.compare, args.tolerance):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
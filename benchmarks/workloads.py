@@ -0,0 +1,21 @@
+"""
+Benchmark 共用的工作負載。
+
+子直譯器與 worker 行程會以「模組 + 名稱」重新匯入函式，因此這些函式必須定義在
+可匯入的模組中，而不能放在以腳本執行的 `__main__` 裡。
+"""
+from async_manager import AsyncManager
+
+manager = AsyncManager()
+
+
+def crunch(n: int) -> int:
+    total = 0
+    for i in range(n):
+        total += i * i
+    return total
+
+
+crunch_thread = manager.to_async(crunch, limiter="bench")
+crunch_interpreter = manager.to_async(crunch, limiter="bench", backend="interpreter")
+crunch_process = manager.to_async(crunch, limiter="bench", backend="process")
@@ -0,0 +1,42 @@
+import urllib.request
+
+import anyio
+
+from async_manager import AsyncManager, KeyedLimiter
+from async_manager.exporter import start_http_server
+
+
+def test_keyed_totals_follow_created_and_evicted_limiters():
+    keyed = KeyedLimiter(2, max_keys=1)
+
+    async def main() -> None:
+        async with keyed.get("a"):
+            assert (keyed.total_tokens, keyed.borrowed_tokens) == (2, 1)
+        keyed.get("b")  # 超過 max_keys，閒置的 "a" 被移除
+        assert (keyed.total_tokens, keyed.borrowed_tokens) == (2, 0)
+
+    anyio.run(main)
+
+
+def test_http_server_renders_on_event_loop():
+    manager = AsyncManager()
+    manager.regist_keyed_limiter("tenant:", KeyedLimiter(2, idle_timeout=0.001))
+
+    @manager.to_async(limiter=lambda i: f"tenant:{i}")
+    def work(i: int) -> int:
+        return i
+
+    def scrape(port: int) -> str:
+        return urllib.request.urlopen(f"http://127.0.0.1:{port}/").read().decode()
+
+    async def main() -> None:
+        server = start_http_server(manager, 0)
+        try:
+            for i in range(20):
+                await work(i)
+                body = await anyio.to_thread.run_sync(scrape, server.server_address[1])
+                assert body.endswith("# EOF\n")
+        finally:
+            server.shutdown()
+
+    anyio.run(main)
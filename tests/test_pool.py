@@ -0,0 +1,70 @@
+import anyio
+import anyio.from_thread
+import pytest
+
+from async_manager import WorkerPool, current_event_loop_token
+
+
+def _gather(pool: WorkerPool, count: int) -> list:
+    """
+    同時送出 count 個工作，回傳每個工作的結果或例外型別名稱。
+    """
+    results = []
+
+    async def call(i: int) -> None:
+        try:
+            results.append(await pool.run_sync(lambda: i))
+        except Exception as exc:
+            results.append(type(exc).__name__)
+
+    async def main() -> None:
+        # 工作在 shield 中等待完成，沒有被通知的工作會讓測試永遠卡住
+        async with anyio.create_task_group() as tg:
+            for i in range(count):
+                tg.start_soon(call, i)
+
+    anyio.run(main)
+    return results
+
+
+def test_on_thread_start_failure_hands_queue_to_replacement():
+    calls = 0
+
+    def start() -> None:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise RuntimeError("boom")
+
+    pool = WorkerPool(1, on_thread_start=start)
+    results = _gather(pool, 5)
+
+    assert results.count("RuntimeError") == 1
+    assert sorted(r for r in results if isinstance(r, int)) == [1, 2, 3, 4]
+    assert pool.threads == 1
+    pool.close()
+
+
+@pytest.mark.parametrize("max_threads", [1, 2])
+def test_on_thread_start_always_failing_fails_every_item(max_threads: int):
+    def start() -> None:
+        raise RuntimeError("boom")
+
+    pool = WorkerPool(max_threads, on_thread_start=start)
+
+    assert _gather(pool, 5) == ["RuntimeError"] * 5
+    assert pool.threads == 0
+
+
+def test_jobs_return_to_event_loop_with_current_event_loop_token():
+    pool = WorkerPool(1)
+
+    def job() -> int:
+        return anyio.from_thread.run_sync(lambda: 42, token=current_event_loop_token())
+
+    async def main() -> int:
+        return await pool.run_sync(job)
+
+    assert anyio.run(main) == 42
+    assert current_event_loop_token() is None
+    pool.close()
@@ -0,0 +1,48 @@
+import threading
+
+import anyio
+import pytest
+
+from async_manager import AsyncManager, WorkerPool
+
+
+def test_on_thread_start_failure_ends_iteration_and_releases_limiter():
+    manager = AsyncManager()
+    limiter = anyio.CapacityLimiter(1)
+
+    def start() -> None:
+        raise RuntimeError("boom")
+
+    manager.regist_limiter("db", limiter, pool=WorkerPool(1, on_thread_start=start))
+
+    @manager.to_async_iter(limiter="db")
+    def rows():
+        yield from range(3)
+
+    async def main() -> None:
+        # 名額沒有歸還時第二次迭代會永遠等待 limiter
+        for _ in range(2):
+            with pytest.raises(RuntimeError, match="boom"):
+                async for _ in rows():
+                    pass
+
+    anyio.run(main)
+    assert limiter.borrowed_tokens == 0
+
+
+def test_threads_are_reused_between_iterations():
+    manager = AsyncManager()
+
+    @manager.to_async_iter
+    def names():
+        yield threading.current_thread().name
+
+    async def main() -> set[str]:
+        await manager.warm_up(default_threads=1, iter_threads=1)
+        seen = set()
+        for _ in range(3):
+            async for name in names():
+                seen.add(name)
+        return seen
+
+    assert anyio.run(main) == {"async-manager-iter-1"}